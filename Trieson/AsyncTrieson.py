@@ -0,0 +1,139 @@
+""" AsyncTrieson.py
+-------------------
+Asyncio interface to a Trieson
+"""
+
+import asyncio
+from functools import partial
+
+class AsyncTrieson:
+    """
+    Asyncio front end for a trie, running generation and lookups in an
+    executor so they don't block the event loop.
+
+    At most `limit` requests are worked on at a time. Further callers wait
+    for a slot, which pushes back on whoever is producing the requests
+    instead of letting work pile up in the executor.
+
+    Concurrent `make()` calls with the same parameters are answered by a
+    single `make_many()` call in the executor: the first call opens a batch,
+    calls made before it is sent (within the same event loop iteration, or
+    within `delay` seconds if set) join it, and each gets one of the words.
+    A batch is sent at once when it reaches `batch_size`.
+
+    Work runs in the given executor, or the event loop's default thread
+    pool. Threads share the trie, which must not be added to in the
+    meantime (see ConcurrentTrieson for that). A process pool would pickle
+    the trie for every call; see ParallelGenerator for generating across
+    processes.
+
+    Constructor Parameters
+    ----------------------
+    trie: Trieson
+        Trie to serve
+    executor: concurrent.futures.Executor
+        Executor to run work in. Defaults to the loop's default executor.
+    limit: int
+        Maximum number of requests worked on at a time
+    batch_size: int
+        Maximum number of make() calls answered by one executor call.
+        Defaults to `limit`.
+    delay: float
+        Seconds a batch waits for more calls before it is sent
+    """
+
+    def __init__(self, trie, *, executor = None, limit: int = 64, batch_size: int = 0, delay: float = 0):
+        self.trie = trie
+        self._executor = executor
+        self._slots = asyncio.Semaphore(limit)
+        self._batch_size = batch_size or limit
+        self._delay = delay
+        self._batches = {} # make() parameters -> futures waiting for a word
+
+    async def _run(self, func, *args, **kwargs):
+        "Run func in the executor once a slot is free"
+
+        async with self._slots:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, partial(func, *args, **kwargs))
+
+    async def make(self, prefix: str = '', weight: float|int = 1, lookahead: int = 0, **kwargs) -> str:
+        "Make a random word, see `Trieson.make()`"
+
+        async with self._slots:
+            loop = asyncio.get_running_loop()
+            key = (prefix, weight, lookahead, tuple(sorted(kwargs.items())))
+
+            batch = self._batches.get(key)
+            if batch is None:
+                batch = self._batches[key] = []
+                if self._delay: loop.call_later(self._delay, self._send, key, batch)
+                else: loop.call_soon(self._send, key, batch)
+
+            future = loop.create_future()
+            batch.append(future)
+
+            if len(batch) >= self._batch_size: self._send(key, batch)
+
+            return await future
+
+    def _send(self, key, batch):
+        "Send a batch of make() calls to the executor, unless already sent"
+
+        if self._batches.get(key) is not batch: return
+        del self._batches[key]
+
+        # callers that gave up don't need a word
+        batch = [future for future in batch if not future.done()]
+        if not batch: return
+
+        prefix, weight, lookahead, kwargs = key
+        loop = asyncio.get_running_loop()
+
+        job = loop.run_in_executor(self._executor, partial(self.trie.make_many, len(batch),
+                                                           prefix, weight, lookahead, **dict(kwargs)))
+
+        def deliver(job):
+            error = None if job.cancelled() else job.exception()
+
+            for i, future in enumerate(batch):
+                if future.done(): continue
+                if job.cancelled(): future.cancel()
+                elif error is not None: future.set_exception(error)
+                else: future.set_result(job.result()[i])
+
+        job.add_done_callback(deliver)
+
+    async def match(self, string: str, limit: int = None) -> list:
+        "Get possible matches to string, see `Trieson.match()`"
+        return await self._run(self.trie.match, string, limit)
+
+    async def stream_make(self, n: int, prefix: str = '', weight: float|int = 1, lookahead: int = 0,
+                          *, chunk_size: int = 100, **kwargs):
+        """
+        Generate `n` random words asynchronously (see `Trieson.make()`).
+
+        Words are made `chunk_size` at a time with `make_many()`. The next
+        chunk is made while the current one is consumed, and no further, so
+        a slow consumer holds back generation.
+        """
+
+        sizes = [min(chunk_size, n - start) for start in range(0, n, chunk_size)]
+        if not sizes: return
+
+        def chunk(size):
+            return asyncio.ensure_future(self._run(self.trie.make_many, size, prefix, weight, lookahead, **kwargs))
+
+        ahead = chunk(sizes[0])
+
+        try:
+            for i in range(len(sizes)):
+                words = await ahead
+                ahead = chunk(sizes[i + 1]) if i + 1 < len(sizes) else None
+
+                for word in words: yield word
+        finally:
+            if ahead is not None: ahead.cancel()
+
+    def __repr__(self):
+        return f'AsyncTrieson()'
@@ -0,0 +1,193 @@
+""" BloomFilter.py
+-----------------
+Bloom filters, for answering most negative lookups without a walk
+"""
+
+from math import ceil, log
+import struct
+import zlib
+
+# bits, hashes, capacity, count
+_FILTER = struct.Struct('<QIQQ')
+# error rate, prefix depth
+_HEADER = struct.Struct('<dI')
+
+class BloomFilter:
+    """
+    Fixed-size Bloom filter of strings.
+
+    Sized for `capacity` keys at a false positive rate of `error_rate`; past
+    that the rate climbs, so the owner should check `full()` and build a
+    bigger filter. Only keys that set a new bit count towards capacity.
+
+    Keys are hashed with CRC-32 and Adler-32 and combined by double hashing,
+    which is cheap enough to beat a short trie walk and stable across
+    processes, so filters can be saved.
+
+    Constructor Parameters
+    ----------------------
+    error_rate: float
+        Target false positive rate
+    capacity: int
+        Number of keys to size for
+    """
+
+    __slots__ = ('error_rate', 'capacity', 'count', '_size', '_hashes', '_bits')
+
+    def __init__(self, error_rate: float = 0.01, capacity: int = 1024):
+        if not 0 < error_rate < 1: raise ValueError('error_rate must be between 0 and 1')
+
+        capacity = max(capacity, 1)
+
+        self.error_rate = error_rate
+        self.capacity = capacity
+        self.count = 0
+        self._size = max(8, ceil(-capacity * log(error_rate) / log(2) ** 2))
+        self._hashes = max(1, round(self._size / capacity * log(2)))
+        self._bits = bytearray((self._size + 7) // 8)
+
+    def add(self, key: str) -> bool:
+        "Add key, returning False if it was (probably) there already"
+
+        data = key.encode('utf-8', 'surrogatepass')
+        h1, h2 = zlib.crc32(data), zlib.adler32(data) | 1
+        bits, size = self._bits, self._size
+        new = False
+
+        for i in range(self._hashes):
+            bit = (h1 + i * h2) % size
+            mask = 1 << (bit & 7)
+            if not bits[bit >> 3] & mask:
+                bits[bit >> 3] |= mask
+                new = True
+
+        if new: self.count += 1
+
+        return new
+
+    def full(self) -> bool:
+        return self.count >= self.capacity
+
+    def __contains__(self, key: str) -> bool:
+        "False if key was never added, True if it (probably) was"
+
+        data = key.encode('utf-8', 'surrogatepass')
+        h1, h2 = zlib.crc32(data), zlib.adler32(data) | 1
+        bits, size = self._bits, self._size
+
+        for i in range(self._hashes):
+            bit = (h1 + i * h2) % size
+            if not bits[bit >> 3] & (1 << (bit & 7)): return False
+
+        return True
+
+    def __len__(self):
+        "Approximate number of keys added"
+        return self.count
+
+    def __repr__(self):
+        return f'BloomFilter({self.error_rate}, {self.capacity})'
+
+class TrieFilter:
+    """
+    Pair of Bloom filters in front of a trie: one of the strings in the trie,
+    for `has()`, and one of the prefixes of up to `depth` characters, for
+    `has_prefix()` and other prefix lookups. A longer prefix can only be in
+    the trie if its first `depth` characters are.
+
+    Constructor Parameters
+    ----------------------
+    error_rate: float
+        Target false positive rate of each filter
+    depth: int
+        Length of the longest prefixes kept
+    strings: int
+        Number of strings to size for
+    prefixes: int
+        Number of prefixes to size for
+    """
+
+    def __init__(self, error_rate: float = 0.01, depth: int = 3, strings: int = 1024, prefixes: int = 1024):
+        self.depth = depth
+        self.strings = BloomFilter(error_rate, strings)
+        self.prefixes = BloomFilter(error_rate, prefixes)
+
+    @property
+    def error_rate(self):
+        return self.strings.error_rate
+
+    def add_string(self, string: str):
+        self.strings.add(string)
+
+    def add_prefix(self, prefix: str):
+        "Add prefix, if it's no longer than depth"
+        if len(prefix) <= self.depth: self.prefixes.add(prefix)
+
+    def add_all(self, string: str):
+        "Add string and all its prefixes"
+        self.strings.add(string)
+        for end in range(1, min(len(string), self.depth) + 1):
+            self.prefixes.add(string[:end])
+
+    def may_have(self, string: str) -> bool:
+        return string in self.strings
+
+    def may_have_prefix(self, prefix: str) -> bool:
+        return not prefix or prefix[:self.depth] in self.prefixes
+
+    def full(self) -> bool:
+        "Whether either filter has reached capacity"
+        return self.strings.full() or self.prefixes.full()
+
+    # SERIALIZATION ----------------------------------------------------------
+
+    def to_bytes(self) -> bytes:
+        "Serialize to the format read by `from_buffer()`"
+
+        out = bytearray(_HEADER.pack(self.error_rate, self.depth))
+
+        for bloom in (self.strings, self.prefixes):
+            out += _FILTER.pack(bloom._size, bloom._hashes, bloom.capacity, bloom.count)
+            out += bloom._bits
+
+        return bytes(out)
+
+    @classmethod
+    def from_buffer(cls, buffer, copy: bool = False):
+        """
+        Create from a buffer written by `to_bytes()`. Bit arrays are views
+        onto the buffer unless `copy` is set; a filter on a read-only buffer
+        can't be added to.
+        """
+
+        view = memoryview(buffer).cast('B')
+
+        error_rate, depth = _HEADER.unpack_from(view, 0)
+        offset = _HEADER.size
+
+        blooms = []
+        for _ in range(2):
+            size, hashes, capacity, count = _FILTER.unpack_from(view, offset)
+            offset += _FILTER.size
+
+            bits = view[offset:offset + (size + 7) // 8]
+            offset += len(bits)
+
+            bloom = BloomFilter.__new__(BloomFilter)
+            bloom.error_rate, bloom.capacity, bloom.count = error_rate, capacity, count
+            bloom._size, bloom._hashes = size, hashes
+            bloom._bits = bytearray(bits) if copy else bits
+            blooms.append(bloom)
+
+        self = cls.__new__(cls)
+        self.depth = depth
+        self.strings, self.prefixes = blooms
+
+        return self
+
+    def copy(self):
+        "Get a copy that can be added to"
+        return TrieFilter.from_buffer(self.to_bytes(), copy = True)
+
+    def __repr__(self):
+        return f'TrieFilter({self.error_rate}, {self.depth})'
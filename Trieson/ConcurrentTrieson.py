@@ -0,0 +1,133 @@
+""" ConcurrentTrieson.py
+------------------------
+Trieson for concurrent readers while strings are being added
+"""
+
+import threading
+
+from .Trieson import Trieson
+
+class ConcurrentTrieson:
+    """
+    Trieson that can be read from any number of threads while other threads
+    add to it.
+
+    Readers never take a lock: every read goes to the latest published
+    version, which is never changed once published. Writers add under a lock
+    to a private working version that shares all its nodes with the
+    published one and copies only the nodes on the paths it changes (see
+    `Trieson._fork()`). The working version is published, by swapping a
+    single reference, once `batch` strings have been added to it or when
+    `publish()` is called. Readers see a batch all at once or not at all.
+
+    For several reads that must agree, pin a version with `snapshot()` and
+    read from that.
+
+    Query methods (`has`, `get`, `match`, `make`, `make_many`, `top_k`, ...)
+    are those of the published version. Versions don't keep a prefix cache,
+    since its entries would be shared between reader threads. Dawg tries
+    can't share nodes and aren't supported.
+
+    Constructor Parameters
+    ----------------------
+    trie: Trieson
+        Trie to start from, which is published as is. Don't add to it
+        directly afterwards. Defaults to a new trie made with `options`.
+    batch: int
+        Number of added strings between publishes
+    options:
+        Constructor parameters for a new trie
+    """
+
+    # methods of the published version that are safe to call from readers
+    _READS = frozenset({
+        'has', 'has_prefix', 'has_many', 'get', 'get_many', 'has_stream', 'get_stream',
+        'substrings', 'match', 'iter_matches', 'match_page', 'top_k', 'count_prefix',
+        'sample_existing', 'index_of', 'word_at', 'make', 'make_many', 'depth',
+        'freeze', 'save',
+    })
+
+    def __init__(self, trie: Trieson = None, *, batch: int = 1000, **options):
+        if trie is None: trie = Trieson(**options)
+
+        if trie._automaton is not None: raise TypeError('dawg tries cannot share nodes')
+
+        trie._cache = None
+
+        self._published = trie
+        self._working = None
+        self._pending = 0
+        self._batch = batch
+        self._lock = threading.Lock()
+
+    def snapshot(self) -> Trieson:
+        "Get the latest published version, which will not change"
+        return self._published
+
+    def add(self, string, *args, **kwargs):
+        """
+        Add string(s) as `Trieson.add()` does. They are seen by readers once
+        published.
+        """
+
+        if isinstance(string, str): string = [string]
+
+        added = 0
+
+        def counted():
+            "Count strings as add() takes them, so any iterable will do"
+            nonlocal added
+            for s in string:
+                added += 1
+                yield s
+
+        with self._lock:
+            if self._working is None:
+                self._working = self._published._fork()
+                self._working._cache = None
+
+            try:
+                self._working.add(counted(), *args, **kwargs)
+            finally:
+                self._pending += added
+
+            if self._pending >= self._batch: self._publish()
+
+        return self
+
+    def publish(self):
+        "Publish strings added since the last publish"
+        with self._lock: self._publish()
+
+    def _publish(self):
+        if self._working is None: return
+
+        # the working version is never changed after this; the next add
+        # forks a new one
+        self._published = self._working
+        self._working = None
+        self._pending = 0
+
+    def __getattr__(self, name):
+        if name in ConcurrentTrieson._READS: return getattr(self._published, name)
+        raise AttributeError(f'ConcurrentTrieson has no attribute {name!r}')
+
+    # MAGIC ------------------------------------------------------------------
+
+    def __contains__(self, string):
+        return self._published.has(string)
+
+    def __getitem__(self, string):
+        return self._published.get(string)
+
+    def __setitem__(self, string, data):
+        self.add(string, data)
+
+    def __len__(self):
+        return len(self._published)
+
+    def __iter__(self):
+        return iter(self._published)
+
+    def __repr__(self):
+        return f'ConcurrentTrieson()'
@@ -0,0 +1,692 @@
+""" FrozenTrieson.py
+-------------------
+Read-only, array-backed Trieson snapshot
+"""
+
+from __future__ import annotations
+from array import array
+from collections import deque
+import os
+import pickle
+import struct
+import sys
+
+from .Trieson import Trieson, walk_sorted
+from .PrefixCache import PrefixCache
+from .BloomFilter import TrieFilter
+from .Triesonode import TERMINATOR, Triesonode, build_table, pick
+
+#--- BINARY FORMAT ----------------------------------------------------------
+
+# A file starts with a header (magic, format version, flags, number of
+# sections) followed by a directory of named sections, each given as an offset
+# and a length. Sections start on 8-byte boundaries so typed arrays can be
+# cast straight out of a mapped buffer.
+
+MAGIC = b'TRSN'
+VERSION = 1
+
+FLAG_BIG_ENDIAN = 1
+
+_HEADER = struct.Struct('<4sHHI') # magic, version, flags, section count
+_ENTRY = struct.Struct('<8sQQ') # name, offset, length
+
+def _align(n: int) -> int:
+    return (n + 7) & ~7
+
+def pack_sections(sections: dict) -> bytes:
+    "Pack a dict of section name -> bytes-like into the binary format"
+
+    flags = FLAG_BIG_ENDIAN if sys.byteorder == 'big' else 0
+
+    offset = _align(_HEADER.size + _ENTRY.size * len(sections))
+    directory = []
+    for name, data in sections.items():
+        directory.append(_ENTRY.pack(name.encode('ascii'), offset, len(data)))
+        offset = _align(offset + len(data))
+
+    out = bytearray(_HEADER.pack(MAGIC, VERSION, flags, len(sections)))
+    for entry in directory: out += entry
+
+    for data in sections.values():
+        out += bytes(_align(len(out)) - len(out))
+        out += data
+
+    return bytes(out)
+
+def unpack_sections(buffer) -> dict:
+    "Get dict of section name -> memoryview from a buffer in the binary format"
+
+    view = memoryview(buffer).cast('B')
+
+    if len(view) < _HEADER.size:
+        raise ValueError('not a Trieson file')
+
+    magic, version, flags, count = _HEADER.unpack_from(view, 0)
+
+    if magic != MAGIC: raise ValueError('not a Trieson file')
+
+    if version > VERSION:
+        raise ValueError(f'Trieson file version {version} is newer than supported version {VERSION}')
+
+    if bool(flags & FLAG_BIG_ENDIAN) != (sys.byteorder == 'big'):
+        raise ValueError('Trieson file was written on a machine with different byte order')
+
+    sections = {}
+    for i in range(count):
+        name, offset, length = _ENTRY.unpack_from(view, _HEADER.size + i * _ENTRY.size)
+        sections[name.rstrip(b'\0').decode('ascii')] = view[offset:offset + length]
+
+    return sections
+
+def _write(path, data: bytes):
+    "Write `data` to `path`, replacing any old file only once it's complete"
+
+    temp = f'{path}.tmp'
+    with open(temp, 'wb') as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+
+    os.replace(temp, path)
+
+#--- NODE VIEWS -------------------------------------------------------------
+
+class FrozenTriesonode:
+    """
+    Lightweight view onto one node of a FrozenTrieson.
+
+    Supports the read-only part of the Triesonode interface. Views are created
+    on demand and compare equal when they refer to the same node.
+    """
+
+    __slots__ = ('_trie', '_index')
+
+    def __init__(self, trie: FrozenTrieson, index: int):
+        self._trie = trie
+        self._index = index
+
+    @property
+    def _value(self):
+        return self._trie._labels[self._index] if self._index else ''
+
+    @property
+    def _count(self):
+        return self._trie._counts[self._index]
+
+    @property
+    def _best(self):
+        return self._trie._totals()[0][self._index]
+
+    @property
+    def _words(self):
+        return self._trie._totals()[1][self._index]
+
+    #--- GET ----------------------------------------------------------------
+
+    def get(self, char = None, weight: int|float = 1, *, exclude_chars = ''):
+        """
+        Return specified child node if exists.
+        If no child node specified, get a random node by relative child counts.
+        """
+
+        if char == None: return pick(self.table(weight), exclude_chars)
+
+        if char == TERMINATOR: return self.get_terminator()
+
+        child = self._trie._child(self._index, char)
+        return None if child is None else FrozenTriesonode(self._trie, child)
+
+    def table(self, weight: int|float = 1):
+        "Get the cached sampling table of this node's children for `weight`"
+
+        tables = self._trie._tables.setdefault(self._index, {})
+
+        table = tables.get(weight)
+        if table is None: table = tables[weight] = build_table(self, weight)
+
+        return table
+
+    def has(self, char = None, n = 0):
+        "Check if child node exists, optionally with at least/at most n count"
+
+        if char is None: return [child._value for child in self]
+
+        child = self.get(char)
+
+        if not n: return child is not None
+        elif n < 0: return child is not None and child._count <= -n
+        else: return child is not None and child._count >= n
+
+    def data(self, data = None):
+        "Snapshot nodes carry no node data"
+
+        if data is not None: raise TypeError('FrozenTrieson is read-only')
+
+        return None
+
+    def children(self):
+        "Get child nodes as list"
+        return list(self)
+
+    def parent(self):
+        "Snapshots do not keep parent links"
+        return None
+
+    def is_terminator(self):
+        return False
+
+    def has_terminator(self):
+        return self._trie._terms[self._index] > 0
+
+    def get_terminator(self):
+        if not self._trie._terms[self._index]: return None
+        return FrozenTriesonodeTerminator(self._trie, self._index)
+
+    traverse = Triesonode.traverse
+
+    #--- SPECIAL ------------------------------------------------------------
+
+    def __len__(self):
+        first = self._trie._first
+        count = first[self._index + 1] - first[self._index]
+        return count + (1 if self._trie._terms[self._index] else 0)
+
+    def __contains__(self, char):
+        return self.has(char)
+
+    def __bool__(self):
+        return True
+
+    def __getitem__(self, char):
+        return self.get(char)
+
+    def __iter__(self):
+        "Iterator over children in the order of the source trie"
+        trie, index = self._trie, self._index
+        first, last = trie._first[index], trie._first[index + 1]
+
+        if not trie._terms[index]:
+            for child in range(first, last): yield FrozenTriesonode(trie, child)
+            return
+
+        # the terminator goes where the source trie had it, see _build()
+        at = first + trie._term_at.get(index, 0)
+        for child in range(first, at): yield FrozenTriesonode(trie, child)
+        yield FrozenTriesonodeTerminator(trie, index)
+        for child in range(at, last): yield FrozenTriesonode(trie, child)
+
+    def __call__(self):
+        return self._value
+
+    def __eq__(self, other):
+        return (type(other) is type(self)
+                and other._trie is self._trie and other._index == self._index)
+
+    def __hash__(self):
+        return hash((type(self), id(self._trie), self._index))
+
+    def __repr__(self):
+        return f'{self}'
+
+    def __str__(self):
+        return f'FrozenTriesonode <{self._value}> x {self._count}, {len(self)} children: {self.has()}'
+
+class FrozenTriesonodeTerminator(FrozenTriesonode):
+    "View onto the terminator fields of a FrozenTrieson node"
+
+    __slots__ = ()
+
+    _value = TERMINATOR
+
+    @property
+    def _count(self):
+        return self._trie._terms[self._index]
+
+    @property
+    def _best(self):
+        return self._trie._terms[self._index]
+
+    _words = 1
+
+    def get(self, *unused, **unused_kwargs):
+        pass
+
+    def has(self, *unused):
+        pass
+
+    def data(self, data = None):
+        if data is not None: raise TypeError('FrozenTrieson is read-only')
+        return self._trie._data.get(self._index, True)
+
+    def children(self):
+        pass
+
+    def is_terminator(self):
+        return True
+
+    def has_terminator(self):
+        return False
+
+    def get_terminator(self):
+        return None
+
+    def traverse(self, *unused, **unused_kwargs):
+        return iter(())
+
+    def __len__(self):
+        return 0
+
+    def __contains__(self, unused):
+        return False
+
+    def __iter__(self):
+        return iter(())
+
+    def __call__(self):
+        return None
+
+    def __str__(self):
+        return f'FrozenTriesonodeTerminator data: {self.data()}'
+
+#--- CLASS DEFINITION -------------------------------------------------------
+
+class FrozenTrieson(Trieson):
+    """
+    Immutable Trieson snapshot stored as flat arrays.
+
+    Nodes are numbered breadth-first, with the children of every node stored
+    contiguously in the order of the source trie, so node `i` owns children
+    `_first[i]` up to (not including) `_first[i + 1]`. Edge labels are kept
+    as one string with a character per node, which lets child lookup run as
+    a single `str.find` over the child range. Per-node arrays hold the node
+    count and the terminator count. Terminator data is kept in a side table
+    and defaults to `True`, and so is the number of children iterated before
+    a terminator, which defaults to 0.
+
+    A snapshot of a dawg trie is its suffix automaton instead, which is
+    already compact: the arrays stay empty and nodes are served through
+    SuffixAutomatonNode views, as in the dawg trie. If the automaton can't be
+    pickled (because of its terminator data), the virtual trie is laid out
+    in arrays like any other.
+
+    All query methods of Trieson work unchanged; `add()` and every other
+    method that would change the trie raise TypeError. Create one with
+    `Trieson.freeze()` or `Trieson.load()`, and get a mutable copy back with
+    `thaw()`.
+    """
+
+    # CONSTRUCTOR ------------------------------------------------------------
+
+    # typecodes of the per-node arrays, by section name
+    _ARRAYS = { 'first': 'I', 'counts': 'Q', 'terms': 'Q' }
+
+    def __init__(self, trie: Trieson):
+        self._first = array('I')
+        self._counts = array('Q')
+        self._terms = array('Q')
+        self._pickled = {}
+        self._data = {}
+        self._term_at = {}
+        self._depth = trie._depth
+        self.dict = frozenset(trie.dict)
+        self._proc = dict(trie._proc)
+        self._log_generation = 0 # first log generation not included, see Trieson.compact()
+        self._dawg = self._pickle_automaton(trie._automaton) # stands in for the arrays, see _setup()
+
+        self._labels = ''.join(self._build(trie._root)) if self._dawg is None else ''
+
+        self._setup()
+
+        # a cache of the same size, but not its entries
+        if trie._cache is not None: self._cache = PrefixCache(trie._cache.info().maxsize)
+
+        if trie._filter is not None: self._filter = trie._filter.copy()
+
+    def _setup(self):
+        "Set up state that isn't part of the stored snapshot"
+        self._tables = {} # sampling tables by node index, then weight
+        self._parents = False
+        self._automaton = None if self._dawg is None else pickle.loads(self._dawg)
+        self._suffixes = None
+        self._log = None
+        self._cache = None
+        self._filter = None
+        self._totals_by_node = None # see _totals()
+        self._root = FrozenTriesonode(self, 0) if self._automaton is None else self._automaton.root()
+
+    def _build(self, root):
+        """
+        Lay out nodes breadth-first from any node implementing the node
+        interface. Fills the count arrays and returns the list of labels.
+        """
+
+        labels = []
+        first, counts, terms, data, term_at = self._first, self._counts, self._terms, self._data, self._term_at
+
+        def append(node, label):
+            terminator = node.get_terminator()
+            if terminator is not None and terminator.data() is not True:
+                data[len(labels)] = terminator.data()
+            labels.append(label)
+            counts.append(node._count)
+            terms.append(terminator._count if terminator is not None else 0)
+
+        append(root, '\0')
+
+        queue = deque([(root, 0)])
+        while queue:
+            node, index = queue.popleft()
+            first.append(len(labels))
+
+            for child in node:
+                if child.is_terminator():
+                    if len(labels) > first[-1]: term_at[index] = len(labels) - first[-1]
+                    continue
+
+                queue.append((child, len(labels)))
+                append(child, child._value)
+
+        first.append(len(labels))
+
+        return labels
+
+    @staticmethod
+    def _pickle_automaton(automaton):
+        "Pickled suffix automaton of a dawg trie, or None"
+
+        if automaton is None: return None
+
+        try:
+            return pickle.dumps(automaton)
+        except (pickle.PicklingError, AttributeError, TypeError):
+            return None
+
+    @classmethod
+    def from_sorted(cls, strings, *args, **kwargs):
+        "Build a snapshot with `Trieson.from_sorted()`"
+        return Trieson.from_sorted(strings, *args, **{ **kwargs, 'frozen': True })
+
+    # Terminator data and positions and the word set are unpickled on first
+    # use, so loading a snapshot doesn't pay for them up front.
+
+    def _unpickled(name):
+        attr = '_' + name
+
+        def get(self):
+            try:
+                return self.__dict__[attr]
+            except KeyError:
+                value = self.__dict__[attr] = pickle.loads(self._pickled.pop(name))
+                return value
+
+        def set(self, value):
+            self.__dict__[attr] = value
+
+        return property(get, set)
+
+    _data = _unpickled('data')
+    _term_at = _unpickled('term_at')
+    dict = _unpickled('dict')
+
+    del _unpickled
+
+    # SERIALIZATION ----------------------------------------------------------
+
+    def to_bytes(self) -> bytes:
+        """
+        Serialize snapshot to the binary format read by `from_buffer()`.
+
+        Terminator data, the word set and the proc configuration are pickled.
+        A proc that can't be pickled (e.g. a lambda) is stored as None. A
+        snapshot of a dawg trie stores its pickled suffix automaton in place
+        of the arrays.
+        """
+
+        try:
+            proc = pickle.dumps(self._proc)
+        except (pickle.PicklingError, AttributeError, TypeError):
+            proc = pickle.dumps(None)
+
+        sections = {
+            'dict': pickle.dumps(self.dict),
+            'proc': proc,
+            'depth': struct.pack('<Q', self._depth),
+            'loggen': struct.pack('<Q', self._log_generation),
+        }
+
+        if self._dawg is not None:
+            sections['dawg'] = self._dawg
+        else:
+            sections['labels'] = self._labels.encode('utf-8', 'surrogatepass')
+            for name in self._ARRAYS: sections[name] = memoryview(getattr(self, '_' + name)).cast('B')
+            sections['data'] = pickle.dumps(self._data)
+            sections['term_at'] = pickle.dumps(self._term_at)
+
+        if self._filter is not None: sections['bloom'] = self._filter.to_bytes()
+
+        return pack_sections(sections)
+
+    @classmethod
+    def from_buffer(cls, buffer):
+        """
+        Create snapshot from a buffer in the binary format, such as bytes,
+        a memory map or shared memory.
+
+        The count and offset arrays are views onto the buffer and are not
+        copied, so the buffer must stay open while the snapshot is in use.
+        Labels are decoded up front. Terminator data and the word set are
+        unpickled on first use. Bloom filter bits are views too. The suffix
+        automaton of a dawg snapshot is unpickled up front.
+        """
+
+        sections = unpack_sections(buffer)
+
+        self = cls.__new__(cls)
+        self._dawg = sections.get('dawg')
+        self._pickled = { 'dict': sections['dict'] }
+
+        if self._dawg is not None:
+            self._labels = ''
+            for name, typecode in cls._ARRAYS.items(): setattr(self, '_' + name, array(typecode))
+            self._data = {}
+            self._term_at = {}
+        else:
+            self._labels = str(sections['labels'], 'utf-8', 'surrogatepass')
+            for name, typecode in cls._ARRAYS.items():
+                setattr(self, '_' + name, sections[name].cast(typecode))
+            self._pickled['data'] = sections['data']
+            if 'term_at' in sections: self._pickled['term_at'] = sections['term_at']
+            else: self._term_at = {}
+
+        self._proc = pickle.loads(sections['proc']) or { 'proc': None, 'args': [], 'kwargs': {} }
+        self._depth = struct.unpack('<Q', sections['depth'])[0]
+        self._log_generation = struct.unpack('<Q', sections['loggen'])[0] if 'loggen' in sections else 0
+
+        self._setup()
+
+        if 'bloom' in sections: self._filter = TrieFilter.from_buffer(sections['bloom'])
+
+        return self
+
+    def save(self, path):
+        "Write snapshot to `path` in the binary format (see `Trieson.load()`)"
+        _write(path, self.to_bytes())
+
+    def thaw(self, *, parents: bool = True) -> Trieson:
+        """
+        Get a mutable Trieson with the same nodes, counts and data.
+
+        If the proc couldn't be stored, the new trie has the default proc.
+        A snapshot of a dawg trie thaws into a dawg trie, unless its suffix
+        automaton couldn't be pickled.
+        """
+
+        proc = self._proc
+
+        if self._dawg is not None:
+            trie = Trieson(proc['proc'], proc['args'], proc['kwargs'], parents = parents, dawg = True)
+            trie._automaton = pickle.loads(self._dawg)
+            trie._root = trie._automaton.root()
+            return self._thawed(trie)
+
+        trie = Trieson(proc['proc'], proc['args'], proc['kwargs'], parents = parents)
+
+        labels, first, counts, terms, data = self._labels, self._first, self._counts, self._terms, self._data
+        term_at = self._term_at
+
+        # nodes are numbered breadth-first, so children are created in order
+        nodes = [trie._root]
+        for index in range(len(labels)):
+            node = nodes[index]
+
+            if terms[index]:
+                node._term = terms[index]
+                node._term_data = data.get(index, True)
+                node._term_at = term_at.get(index, 0)
+
+            if first[index] == first[index + 1]: continue
+
+            node._children = {}
+            for child in range(first[index], first[index + 1]):
+                new = node._children[labels[child]] = Triesonode(node if parents else None, labels[child])
+                new._count = counts[child]
+                nodes.append(new)
+
+        for node, best, words in zip(nodes, *self._totals()):
+            node._best = best
+            node._words = words
+
+        return self._thawed(trie)
+
+    def _thawed(self, trie):
+        "Give a thawed trie the depth, word set and filter of this one"
+
+        trie._depth = self._depth
+        trie.dict = set(self.dict)
+        if self._filter is not None: trie._filter = self._filter.copy()
+
+        return trie
+
+    # NODE ACCESS ------------------------------------------------------------
+
+    def _totals(self):
+        """
+        Get lists of the highest terminator count and the number of strings
+        in the subtree of each node, built on first use
+        """
+
+        if self._totals_by_node is None:
+            first, terms = self._first, self._terms
+            best = list(terms)
+            words = [1 if term else 0 for term in terms]
+
+            # children are numbered after their parents
+            for index in range(len(best) - 1, -1, -1):
+                for child in range(first[index], first[index + 1]):
+                    if best[child] > best[index]: best[index] = best[child]
+                    words[index] += words[child]
+
+            self._totals_by_node = (best, words)
+
+        return self._totals_by_node
+
+    def _child(self, index: int, char: str):
+        "Index of child `char` of node `index`, or None"
+
+        if len(char) != 1: return None
+
+        child = self._labels.find(char, self._first[index], self._first[index + 1])
+
+        return child if child >= 0 else None
+
+    def _index_at_prefix(self, prefix: str):
+        "Walk prefix over the arrays without creating node views"
+
+        labels, first = self._labels, self._first
+
+        index = 0
+        for char in prefix:
+            index = labels.find(char, first[index], first[index + 1])
+            if index < 0: return None
+
+        return index
+
+    # GET/SET/QUERY METHODS --------------------------------------------------
+
+    def _read_only(self, *unused, **unused_kwargs):
+        raise TypeError('FrozenTrieson is read-only')
+
+    # everything that would change the trie
+    add = add_counts = add_stream = add_parallel = merge = _read_only
+    _add_word = _insert = _add_sorted = _merge = attach_log = compact = _read_only
+
+    def freeze(self):
+        return self
+
+    # a dawg snapshot has no arrays, and walks its automaton as Trieson does
+
+    def _find_prefix(self, prefix: str, proc = None):
+        if proc or self._automaton is not None: return super()._find_prefix(prefix, proc)
+
+        index = self._index_at_prefix(prefix or '')
+
+        return None if index is None else FrozenTriesonode(self, index)
+
+    def _find_many(self, strings: list) -> list:
+        if self._automaton is not None: return super()._find_many(strings)
+
+        return [None if index is None else FrozenTriesonode(self, index)
+                for index in self._indexes_many(strings)]
+
+    def _indexes_many(self, strings: list) -> list:
+        "Shared-prefix walk of Trieson._find_many() over the arrays"
+
+        labels, first = self._labels, self._first
+
+        def extend(path, rest):
+            index = path[-1]
+            for c in rest:
+                index = labels.find(c, first[index], first[index + 1])
+                if index < 0: return None
+                path.append(index)
+            return index
+
+        return walk_sorted(strings, 0, extend, self._filter)
+
+    def has_many(self, strings) -> list:
+        "See which of strings are in Trie, see Trieson.has_many()"
+
+        if self._automaton is not None: return super().has_many(strings)
+
+        terms = self._terms
+        return [index is not None and terms[index] > 0 for index in self._indexes_many(list(strings))]
+
+    def has(self, string):
+        "See if string is in Trie"
+
+        if self._automaton is not None: return super().has(string)
+
+        if self._filter is not None and not self._filter.may_have(string): return False
+
+        index = self._index_at_prefix(string)
+
+        return index is not None and self._terms[index] > 0
+
+    # MAGIC ------------------------------------------------------------------
+
+    __setitem__ = _read_only
+
+    def __len__(self):
+        return len(self.dict)
+
+    # STRING -----------------------------------------------------------------
+
+    def __repr__(self):
+        return f'FrozenTrieson()'
+
+    def __str__(self):
+        if self._automaton is not None:
+            return f'FrozenTrieson - depth {self.depth()}, dawg of {len(self._automaton)} states'
+
+        return f'FrozenTrieson - depth {self.depth()}, {len(self._labels)} nodes'
@@ -0,0 +1,95 @@
+""" ParallelGenerator.py
+------------------------
+Generate words from a Trieson across a pool of processes
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+import os
+import random
+import tempfile
+
+from .FrozenTrieson import FrozenTrieson
+
+# per-process state for workers, set up by _attach()
+_worker = {}
+
+def _attach(path: str):
+    "Worker initializer: map the serialized trie"
+    _worker['trie'] = FrozenTrieson.load(path)
+
+def _make_chunk(n, seed, args, kwargs):
+    "Worker task: make `n` words from a fresh seed"
+    random.seed(seed)
+    return _worker['trie'].make_many(n, *args, **kwargs)
+
+class ParallelGenerator:
+    """
+    Generate words from a trie with a pool of worker processes.
+
+    The trie is frozen and written once to a temporary file in the binary
+    snapshot format. Each worker maps that file when it starts, so the trie
+    is shared through the page cache rather than pickled per task.
+
+    Requests are split into chunks of `chunk_size` words. Every chunk is
+    seeded from `seed`, the call number and the chunk number, so the same
+    seed and the same sequence of calls give the same words no matter how
+    chunks are spread over workers. Results are returned in chunk order.
+
+    Use as a context manager, or call `close()` when done.
+
+    Constructor Parameters
+    ----------------------
+    trie: Trieson
+        Trie to generate from. Later changes to it are not seen by workers.
+    workers: int
+        Number of worker processes. Defaults to the number of CPUs.
+    seed: Any
+        Base seed. Defaults to a random one.
+    chunk_size: int
+        Number of words per task.
+    """
+
+    def __init__(self, trie, workers: int = None, *, seed = None, chunk_size: int = 1000):
+        self._seed = seed if seed is not None else random.getrandbits(64)
+        self._chunk_size = chunk_size
+        self._calls = 0
+
+        fd, self._path = tempfile.mkstemp(suffix = '.trieson')
+        os.close(fd)
+        trie.save(self._path)
+
+        self._pool = ProcessPoolExecutor(workers, initializer = _attach, initargs = (self._path,))
+
+    def make(self, n: int, prefix: str = '', weight: float|int = 1, lookahead: int = 0, **kwargs):
+        """
+        Make `n` random words across the worker pool. Takes the same
+        parameters as `Trieson.make()`. Returns a list in chunk order.
+        """
+
+        call = self._calls
+        self._calls += 1
+
+        sizes = [min(self._chunk_size, n - start) for start in range(0, n, self._chunk_size)]
+        seeds = [f'{self._seed}:{call}:{chunk}' for chunk in range(len(sizes))]
+        args = (prefix, weight, lookahead)
+
+        chunks = self._pool.map(_make_chunk, sizes, seeds,
+                                [args] * len(sizes), [kwargs] * len(sizes))
+
+        return [word for chunk in chunks for word in chunk]
+
+    def close(self):
+        "Shut down workers and remove the serialized trie"
+
+        self._pool.shutdown()
+
+        if os.path.exists(self._path): os.remove(self._path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *unused):
+        self.close()
+
+    def __repr__(self):
+        return f'ParallelGenerator()'
@@ -0,0 +1,81 @@
+""" PrefixCache.py
+-----------------
+Size-bounded LRU cache of prefix to node lookups
+"""
+
+from collections import OrderedDict
+from typing import NamedTuple
+
+class CacheInfo(NamedTuple):
+    "Statistics for a PrefixCache, in the style of functools.lru_cache"
+    hits: int
+    misses: int
+    maxsize: int
+    currsize: int
+
+class PrefixCache:
+    """
+    Least recently used cache mapping prefixes to trie nodes.
+
+    Nodes are never removed from a trie, so a prefix that was found stays
+    found and its entry is kept until it is evicted. A prefix that was not
+    found may be added later: these entries are tagged with the generation
+    they were made in and ignored after `invalidate()`, which the owning
+    trie calls whenever it gains strings.
+
+    Constructor Parameters
+    ----------------------
+    size: int
+        Maximum number of prefixes kept
+    """
+
+    def __init__(self, size: int):
+        self._size = size
+        self._entries = OrderedDict() # prefix -> (node or None, generation)
+        self._generation = 0
+        self._hits = 0
+        self._misses = 0
+
+    def lookup(self, prefix: str, find):
+        "Get node for prefix from the cache, or from `find(prefix)` on a miss"
+
+        entries = self._entries
+
+        entry = entries.get(prefix)
+        if entry is not None and (entry[0] is not None or entry[1] == self._generation):
+            entries.move_to_end(prefix)
+            self._hits += 1
+            return entry[0]
+
+        self._misses += 1
+
+        node = find(prefix)
+
+        entries[prefix] = (node, self._generation)
+        entries.move_to_end(prefix)
+        if len(entries) > self._size: entries.popitem(last = False)
+
+        return node
+
+    def invalidate(self, found: bool = False):
+        """
+        Forget prefixes that were not found - called after the trie gains
+        strings. With `found`, forget all prefixes, for tries whose nodes
+        can go stale.
+        """
+        self._generation += 1
+        if found: self._entries.clear()
+
+    def clear(self):
+        "Empty cache and reset statistics"
+        self._entries.clear()
+        self._hits = self._misses = 0
+
+    def info(self) -> CacheInfo:
+        return CacheInfo(self._hits, self._misses, self._size, len(self._entries))
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __repr__(self):
+        return f'PrefixCache({self._size})'
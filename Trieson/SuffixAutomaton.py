@@ -0,0 +1,427 @@
+""" SuffixAutomaton.py
+----------------------
+Suffix automaton standing in for a trie of every word suffix
+"""
+
+from __future__ import annotations
+
+from .Triesonode import TERMINATOR, Triesonode, _update_data, build_table, pick
+
+#--- NODE VIEWS -------------------------------------------------------------
+
+class SuffixAutomatonNode:
+    """
+    View of one node of the virtual suffix trie held by a SuffixAutomaton.
+
+    A node stands for a string `s`: it is identified by the automaton state
+    containing `s` and the length of `s`. For strings shorter than the
+    minimum suffix length the string itself is kept too, since their counts
+    need a correction (see SuffixAutomaton). Supports the read-only part of
+    the Triesonode interface.
+    """
+
+    __slots__ = ('_automaton', '_state', '_length', '_short', '_value')
+
+    def __init__(self, automaton, state: int, length: int, short: str|None, value: str):
+        self._automaton = automaton
+        self._state = state
+        self._length = length
+        self._short = short
+        self._value = value
+
+    @property
+    def _count(self):
+        if not self._length: return 1
+        return self._automaton._count(self._state, self._short)
+
+    @property
+    def _best(self):
+        # every string ending below passes through this node, so its count
+        # bounds their terminator counts
+        return self._count
+
+    @property
+    def _words(self):
+        "Number of strings ending in subtree"
+        return self._automaton._strings_below(self._state, self._length, self._short)
+
+    #--- GET ----------------------------------------------------------------
+
+    def get(self, char = None, weight: int|float = 1, *, exclude_chars = ''):
+        """
+        Return specified child node if exists.
+        If no child node specified, get a random node by relative child counts.
+        """
+
+        if char == None: return pick(self.table(weight), exclude_chars)
+
+        if char == TERMINATOR: return self.get_terminator()
+
+        return self._automaton._child(self, char)
+
+    def table(self, weight: int|float = 1):
+        "Get the cached sampling table of this node's children for `weight`"
+
+        tables = self._automaton._tables.setdefault((self._state, self._length), {})
+
+        table = tables.get(weight)
+        if table is None: table = tables[weight] = build_table(self, weight)
+
+        return table
+
+    def has(self, char = None, n = 0):
+        "Check if child node exists, optionally with at least/at most n count"
+
+        if char is None: return [child._value for child in self]
+
+        child = self.get(char)
+
+        if not n: return child is not None
+        elif n < 0: return child is not None and child._count <= -n
+        else: return child is not None and child._count >= n
+
+    def data(self, data = None):
+        "Virtual nodes carry no node data"
+
+        if data is not None: raise TypeError('suffix automaton nodes carry no data')
+
+        return None
+
+    def children(self):
+        "Get child nodes as list"
+        return list(self)
+
+    def parent(self):
+        "Virtual nodes do not keep parent links"
+        return None
+
+    def is_terminator(self):
+        return False
+
+    def has_terminator(self):
+        return self._automaton._ends_at(self._state, self._length) > 0
+
+    def get_terminator(self):
+        if not self.has_terminator(): return None
+        return SuffixAutomatonTerminator(self._automaton, self._state, self._length, self._short, TERMINATOR)
+
+    traverse = Triesonode.traverse
+
+    #--- SPECIAL ------------------------------------------------------------
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __contains__(self, char):
+        return self.has(char)
+
+    def __bool__(self):
+        return True
+
+    def __getitem__(self, char):
+        return self.get(char)
+
+    def __iter__(self):
+        "Iterator over children - terminator first"
+        terminator = self.get_terminator()
+        if terminator is not None: yield terminator
+        yield from self._automaton._children(self)
+
+    def __call__(self):
+        return self._value
+
+    def __eq__(self, other):
+        return (type(other) is type(self) and other._automaton is self._automaton
+                and other._state == self._state and other._length == self._length)
+
+    def __hash__(self):
+        return hash((type(self), id(self._automaton), self._state, self._length))
+
+    def __repr__(self):
+        return f'{self}'
+
+    def __str__(self):
+        return f'SuffixAutomatonNode <{self._value}> x {self._count}, {len(self)} children: {self.has()}'
+
+class SuffixAutomatonTerminator(SuffixAutomatonNode):
+    "View of the terminator of a virtual suffix trie node"
+
+    __slots__ = ()
+
+    @property
+    def _count(self):
+        return self._automaton._ends_at(self._state, self._length)
+
+    _words = 1
+
+    def get(self, *unused, **unused_kwargs):
+        pass
+
+    def has(self, *unused):
+        pass
+
+    def data(self, data = None):
+        if data is not None: raise TypeError('set data by adding the string again')
+        return self._automaton._data.get(self._state)
+
+    def children(self):
+        pass
+
+    def is_terminator(self):
+        return True
+
+    def has_terminator(self):
+        return False
+
+    def get_terminator(self):
+        return None
+
+    def traverse(self, *unused, **unused_kwargs):
+        return iter(())
+
+    def __len__(self):
+        return 0
+
+    def __contains__(self, unused):
+        return False
+
+    def __iter__(self):
+        return iter(())
+
+    def __call__(self):
+        return None
+
+    def __str__(self):
+        return f'SuffixAutomatonTerminator data: {self.data()}'
+
+#--- CLASS DEFINITION -------------------------------------------------------
+
+class SuffixAutomaton:
+    """
+    Generalized suffix automaton over a set of words, presented as the trie
+    that `combos.seq_to_end` preprocessing would build: every suffix of at
+    least `min` characters of every added word.
+
+    The automaton grows linearly with the input, where the trie grows with
+    the square of word length. Node counts and terminator counts of the
+    virtual trie are derived from the automaton:
+
+    - the count of a node is the number of occurrences of its string that
+      start at least `min` characters before the end of a word. This is the
+      number of occurrences in the automaton's state minus a small
+      correction for strings shorter than `min` that occur within the last
+      `min - 1` characters of a word. A state's occurrences are the
+      positions of added words that end in it or in a state below it in the
+      suffix-link tree. Each added character counts one for every state on
+      the suffix-link chain of the state it ends in, and a split state starts
+      with the occurrences of the state it came from.
+    - the terminator count of a node of at least `min` characters is the
+      number of added words that end with its string. Every string in a
+      state has the same count, kept per state and updated along the
+      suffix-link chain of each added word.
+    - the number of strings ending in the subtree of a node of at least
+      `min` characters is the same for every string in a state, and is
+      kept per state. Shorter nodes keep theirs by string. Each add counts
+      the suffixes it makes new on the nodes along their paths, and a
+      split state starts with the count of the state it came from.
+
+    Use through `Trieson(dawg = True)`.
+    """
+
+    def __init__(self, min: int = 2):
+        self._min = max(min, 1)
+
+        # per-state arrays; state 0 is the root
+        self._next = [{}] # transitions
+        self._link = [-1] # suffix links
+        self._length = [0] # length of longest string in state
+        self._ends = [0] # number of added words ending in state
+        self._data = {} # terminator data by state
+
+        self._occurrences = [0] # word positions ending in state's suffix-link subtree
+        self._short = {} # occurrences too close to a word end, by string
+        self._strings = [0] # strings ending below nodes of at least min characters
+        self._short_strings = {} # the same for shorter nodes, by string
+        self._tables = {} # sampling tables by node key, then weight
+
+    #--- CONSTRUCTION -------------------------------------------------------
+
+    def _new_state(self, length: int, link: int = -1, transitions: dict = None) -> int:
+        self._next.append(transitions if transitions is not None else {})
+        self._link.append(link)
+        self._length.append(length)
+        self._occurrences.append(0)
+        self._ends.append(0)
+        self._strings.append(0)
+        return len(self._length) - 1
+
+    def _clone(self, q: int, length: int) -> int:
+        "Split state `q`, moving its strings up to `length` to a new state"
+
+        clone = self._new_state(length, self._link[q], dict(self._next[q]))
+
+        # before the split every string in q was a suffix of the same words,
+        # and ended at the same positions
+        self._ends[clone] = self._ends[q]
+        self._occurrences[clone] = self._occurrences[q]
+        self._strings[clone] = self._strings[q]
+        if q in self._data: self._data[clone] = self._data[q]
+
+        self._link[q] = clone
+
+        return clone
+
+    def _extend(self, last: int, char: str) -> int:
+        "Add `char` after state `last`, returning the state of the new string"
+
+        nxt, link, length = self._next, self._link, self._length
+
+        # transition already exists from an earlier word
+        if char in nxt[last]:
+            q = nxt[last][char]
+            if length[q] == length[last] + 1: return q
+
+            clone = self._clone(q, length[last] + 1)
+            p = last
+            while p != -1 and nxt[p].get(char) == q:
+                nxt[p][char] = clone
+                p = link[p]
+
+            return clone
+
+        cur = self._new_state(length[last] + 1)
+
+        p = last
+        while p != -1 and char not in nxt[p]:
+            nxt[p][char] = cur
+            p = link[p]
+
+        if p == -1:
+            link[cur] = 0
+        else:
+            q = nxt[p][char]
+            if length[p] + 1 == length[q]:
+                link[cur] = q
+            else:
+                clone = self._clone(q, length[p] + 1)
+                while p != -1 and nxt[p].get(char) == q:
+                    nxt[p][char] = clone
+                    p = link[p]
+                link[cur] = clone
+
+        return cur
+
+    def add(self, word: str, data = True, count: int = 1) -> int:
+        """
+        Add `word` (`count` times) and associate its suffixes with data.
+        Words shorter than `min` have no suffixes to add.
+
+        Returns number of characters of the longest suffix added.
+        """
+
+        if len(word) < self._min: return 0
+
+        link, occurrences = self._link, self._occurrences
+
+        last = 0
+        for char in word:
+            last = self._extend(last, char)
+
+            # the new position ends in every state up the suffix-link chain
+            state = last
+            while state != -1:
+                occurrences[state] += count
+                state = link[state]
+
+        # every suffix of at least min characters now ends a word. Those in
+        # states that ended no word before are new to the virtual trie
+        new = []
+        state = last
+        while state > 0 and self._length[state] >= self._min:
+            if not self._ends[state]:
+                new.extend(range(max(self._min, self._length[self._link[state]] + 1), self._length[state] + 1))
+            self._ends[state] += count
+            if state not in self._data:
+                self._data[state] = _update_data(None, data)
+            elif data:
+                self._data[state] = _update_data(self._data[state], data)
+            state = self._link[state]
+
+        # occurrences within the last min - 1 characters don't start a suffix
+        tail = word[len(word) - self._min + 1:]
+        for i in range(len(tail)):
+            for j in range(i + 1, len(tail) + 1):
+                self._short[tail[i:j]] = self._short.get(tail[i:j], 0) + count
+
+        for size in new: self._count_string(word[len(word) - size:])
+
+        self._tables.clear()
+
+        return len(word)
+
+    def _count_string(self, string: str):
+        "Count a string new to the virtual trie on every node of its path"
+
+        nxt, lengths, min = self._next, self._length, self._min
+        strings, short = self._strings, self._short_strings
+
+        short[''] = short.get('', 0) + 1
+
+        state = 0
+        for length, char in enumerate(string, 1):
+            state = nxt[state][char]
+            if length < min:
+                short[string[:length]] = short.get(string[:length], 0) + 1
+            elif length == lengths[state]:
+                # the same string goes below every other string in the state,
+                # and is also added after the longest one, so count it there
+                strings[state] += 1
+
+    #--- VIRTUAL TRIE -------------------------------------------------------
+
+    def root(self) -> SuffixAutomatonNode:
+        return SuffixAutomatonNode(self, 0, 0, '' if self._min > 1 else None, '')
+
+    def _count(self, state: int, short: str|None) -> int:
+        "Count of virtual trie node in `state` (see class description)"
+
+        count = self._occurrences[state]
+        if short is not None: count -= self._short.get(short, 0)
+
+        return count
+
+    def _strings_below(self, state: int, length: int, short: str|None) -> int:
+        "Number of strings ending in the subtree of virtual trie node"
+        if length >= self._min: return self._strings[state]
+        return self._short_strings.get(short or '', 0)
+
+    def _ends_at(self, state: int, length: int) -> int:
+        "Terminator count of virtual trie node"
+        return self._ends[state] if length >= self._min else 0
+
+    def _view(self, node: SuffixAutomatonNode, char: str, state: int):
+        "View of child `char` of `node`, if its count isn't 0"
+
+        length = node._length + 1
+        short = node._short + char if node._short is not None and length < self._min else None
+
+        if self._count(state, short) <= 0: return None
+
+        return SuffixAutomatonNode(self, state, length, short, char)
+
+    def _child(self, node: SuffixAutomatonNode, char: str):
+        state = self._next[node._state].get(char)
+        return None if state is None else self._view(node, char, state)
+
+    def _children(self, node: SuffixAutomatonNode):
+        for char, state in self._next[node._state].items():
+            child = self._view(node, char, state)
+            if child is not None: yield child
+
+    def __getstate__(self):
+        "Pickle without sampling tables"
+        return { **self.__dict__, '_tables': {} }
+
+    def __len__(self):
+        "Number of states"
+        return len(self._length)
@@ -0,0 +1,95 @@
+""" SuffixIndex.py
+-----------------
+Suffix links over a trie, for sliding a fixed-length window along a string
+"""
+
+class SuffixIndex:
+    """
+    Lazily compiled suffix links for the nodes of a trie.
+
+    The link of the node for string `s` is the node for `s[1:]`, in the spirit
+    of Aho-Corasick failure links. Unlike failure links it is exact: if
+    `s[1:]` is not in the trie the link is None rather than a shorter suffix.
+    `Trieson.make` needs this exact form because it looks up a window of a
+    fixed number of characters.
+
+    Links are computed on first use and remembered. The index records the
+    parent and character of every node it hands out, so it works on tries
+    built without parent links. Nodes are never removed from a trie, so links
+    that were found stay valid after `add()`. Missing links are remembered
+    only until `invalidate()` is called, which the owning trie does whenever
+    it gains strings.
+
+    Works with any node implementing the Triesonode interface.
+    """
+
+    def __init__(self, root):
+        self._root = root
+        self._up = {}     # node -> (parent node, char)
+        self._links = {}  # node -> suffix link node
+        self._misses = {} # node -> generation in which the link was missing
+        self._generation = 0
+
+    def invalidate(self):
+        "Forget missing links - called after the trie gains strings"
+        self._generation += 1
+
+    def child(self, node, char):
+        "Get child `char` of `node`, recording how it was reached"
+
+        child = node.get(char)
+        if child is not None and child not in self._up:
+            self._up[child] = (node, char)
+
+        return child
+
+    def walk(self, string):
+        "Get node at end of `string` from the root, or None"
+
+        node = self._root
+        for char in string:
+            node = self.child(node, char)
+            if node is None: return None
+
+        return node
+
+    def link(self, node):
+        "Get node for the string at `node` minus its first character, or None"
+
+        link = self._links.get(node)
+        if link is not None: return link
+
+        if self._misses.get(node) == self._generation: return None
+
+        up = self._up.get(node)
+        if up is None: return None
+
+        parent, char = up
+
+        if parent == self._root:
+            link = self._root
+        else:
+            link = self.link(parent)
+            if link is not None: link = self.child(link, char)
+
+        if link is None: self._misses[node] = self._generation
+        else: self._links[node] = link
+
+        return link
+
+    def slide(self, node, length: int, char: str, size: int):
+        """
+        Given `node` for a string of `length` characters, get the node for the
+        last `size` characters of that string plus `char`. If the string plus
+        `char` is shorter than `size`, get the node for all of it.
+
+        Returns None when the window is not in the trie, or when it cannot be
+        reached through suffix links alone.
+        """
+
+        while length >= size:
+            node = self.link(node)
+            if node is None: return None
+            length -= 1
+
+        return self.child(node, char)
@@ -3,13 +3,182 @@
 Trie class
 """
 
-from typing import Optional, Any
+from typing import Optional, Any, NamedTuple
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from heapq import heappop, heappush
+from itertools import islice
 
+import gc
 import logging
-
-from .Triesonode import Triesonode
+import mmap as _mmap
+import os
+import pickle
+import random
+import threading
+import time
+
+try:
+    import numpy
+except ImportError: # optional - only used to draw random numbers in bulk
+    numpy = None
+
+from .Triesonode import Triesonode, TERMINATOR, pick_index, remap, _NO_CHILDREN
+from .SuffixIndex import SuffixIndex
+from .SuffixAutomaton import SuffixAutomaton
+from .TriesonLog import TriesonLog, read_log, segments
+from .PrefixCache import PrefixCache, CacheInfo
+from .BloomFilter import TrieFilter
+from .WordSet import WordSet
 from . import combos
 
+#--- HELPERS ----------------------------------------------------------------
+
+def bulk_random(size: int = 1024):
+    """
+    Get a function returning random floats in [0, 1) like `random.random`.
+
+    With NumPy available, numbers are drawn `size` at a time from a NumPy
+    generator seeded from `random`, which is much cheaper per number.
+    Without NumPy this is just `random.random`.
+    """
+
+    if numpy is None: return random.random
+
+    rng = numpy.random.default_rng(random.getrandbits(64))
+    buffer = []
+
+    def rand():
+        if not buffer: buffer.extend(rng.random(size).tolist())
+        return buffer.pop()
+
+    return rand
+
+def read_lines(path, *, mmap: bool = False, encoding: str = 'utf-8'):
+    "Generate stripped, non-empty lines of a text file"
+
+    with open(path, 'rb') as f:
+        if mmap:
+            with _mmap.mmap(f.fileno(), 0, access = _mmap.ACCESS_READ) as mapped:
+                for line in iter(mapped.readline, b''):
+                    line = line.decode(encoding).strip()
+                    if line: yield line
+        else:
+            for line in f:
+                line = line.decode(encoding).strip()
+                if line: yield line
+
+def common_prefix(a: str, b: str) -> int:
+    "Length of the prefix shared by strings a and b"
+
+    shared = 0
+    if a[:1] == b[:1]:
+        for x, y in zip(a, b):
+            if x != y: break
+            shared += 1
+
+    return shared
+
+def walk_sorted(strings: list, root, extend, bloom = None) -> list:
+    """
+    Get the node at each of strings (None if missing), in input order.
+
+    Strings are walked in sorted order on a single path of nodes, root
+    first. Each string picks up from the end of the prefix it shares with
+    the previous one, so shared prefixes (and repeated strings) are only
+    walked once. `extend(path, rest)` walks the characters `rest` on from
+    the last node of `path`, appending the nodes it passes, and returns the
+    last one or None if it falls off. Nodes can be anything it understands.
+    Strings ruled out by the Bloom filter `bloom` aren't walked.
+    """
+
+    found = [None] * len(strings)
+
+    path = [root]
+    previous = ''
+
+    for i in sorted(range(len(strings)), key = strings.__getitem__):
+        s = strings[i]
+
+        if bloom is not None and not bloom.may_have(s): continue
+
+        # the path stops short of the shared prefix if the previous string
+        # wasn't found, in which case the walk resumes there
+        del path[common_prefix(previous, s) + 1:]
+        previous = s
+
+        found[i] = extend(path, s[len(path) - 1:])
+
+    return found
+
+def raise_best(path, count: int):
+    "Raise the subtree best terminator count along a path of nodes to `count`"
+
+    # bests only grow, and never shrink going up, so stop at the first node
+    # that already has count
+    for node in reversed(path):
+        if node._best >= count: break
+        node._best = count
+
+def keep_last(mine, theirs):
+    "Default data reducer for Trieson.merge(), see there"
+    return theirs if theirs else mine
+
+class Flat(NamedTuple):
+    """
+    Nodes of a trie in pre-order, children in iteration order, as parallel
+    lists of labels, counts and numbers of children, plus terminator data by
+    position where it isn't True. Terminators are entries of their own,
+    labelled TERMINATOR, so they keep their place among the children. Built
+    by `flatten()` for Trieson.merge(); cheap to pickle.
+    """
+    values: list
+    counts: list
+    sizes: list
+    data: dict
+
+def flatten(root) -> Flat:
+    "Lay out the nodes below and including `root` as a Flat"
+
+    flat = Flat([], [], [], {})
+    stack = [root]
+
+    while stack:
+        node = stack.pop()
+
+        if node.is_terminator():
+            if node.data() is not True: flat.data[len(flat.values)] = node.data()
+            children = ()
+        else:
+            children = list(node)
+
+        flat.values.append(node._value)
+        flat.counts.append(node._count)
+        flat.sizes.append(len(children))
+
+        stack.extend(reversed(children))
+
+    return flat
+
+def _build_chunk(strings, data, proc, proc_args, proc_kwargs, parents):
+    "Worker task for Trieson.add_parallel(): build a partial trie, flattened"
+
+    # a build only creates objects, see Trieson.from_sorted()
+    gc.disable()
+
+    try:
+        trie = Trieson(proc, proc_args, proc_kwargs, parents = parents).add(strings, data)
+        return flatten(trie._root), trie.dict, trie._depth
+    finally:
+        gc.enable()
+
+class Progress(NamedTuple):
+    "Progress report for Trieson.add_stream()"
+    words: int
+    nodes: int
+    seconds: float
+    rate: float
+
 #--- CLASS DEFINITION -------------------------------------------------------
 
 class Trieson():
@@ -24,12 +193,47 @@ class Trieson():
         Arguments for preprocessing function
     proc_kwargs: dict
         Keyword arguments for preprocessing function
+    parents: bool
+        Whether nodes keep a reference to their parent node. Turning this off
+        saves memory and avoids reference cycles on large tries, but
+        `Triesonode.parent()` will always return None.
+    dawg: bool
+        Store strings in a suffix automaton instead of a trie. This gives
+        the same behavior as the default `combos.seq_to_end` preprocessing
+        (including its `min` argument) while growing linearly with the
+        input. Only available with that preprocessing.
+    cache_size: int
+        Keep up to this many prefix lookups in a least recently used cache
+        (see `cache_info()`). 0 turns the cache off.
+    bloom: float
+        Keep Bloom filters of the strings and short prefixes in the trie,
+        with this false positive rate, so most lookups of strings that
+        aren't there return without walking the trie. 0 turns them off.
+    bloom_depth: int
+        Length of the longest prefixes kept in the Bloom filter. Longer
+        prefixes are checked by their first `bloom_depth` characters.
     """
 
     # CONSTRUCTOR ------------------------------------------------------------
 
-    def __init__(self, proc = None, proc_args: list|tuple = [], proc_kwargs: dict = {}):
+    def __init__(self, proc = None, proc_args: list|tuple = [], proc_kwargs: dict = {},
+                 *,
+                 parents: bool = True,
+                 dawg: bool = False,
+                 cache_size: int = 0,
+                 bloom: float = 0,
+                 bloom_depth: int = 3
+    ):
         self._root = Triesonode()
+        self._parents = parents
+        self._automaton = None
+        self._suffixes = None # SuffixIndex, built on first make() with lookahead
+        self._log = None # TriesonLog, see attach_log()
+        self._compaction = None # thread writing the last compact() snapshot
+        self._cache = PrefixCache(cache_size) if cache_size else None
+        self._filter = TrieFilter(bloom, bloom_depth) if bloom else None
+        self._owner = None # token of nodes this trie may change in place, see _fork()
+        self._copied = False # whether shared nodes were copied since _added()
         self._depth = 0
         self.dict = set()
         self._proc = {
@@ -38,6 +242,132 @@ class Trieson():
             "kwargs": proc_kwargs
         }
 
+        if dawg:
+            if self._proc['proc'] is not combos.seq_to_end:
+                raise ValueError('dawg mode needs combos.seq_to_end preprocessing')
+
+            min = proc_kwargs.get('min', proc_args[0] if proc_args else 2)
+            self._automaton = SuffixAutomaton(min)
+            self._root = self._automaton.root()
+
+    @classmethod
+    def from_sorted(cls,
+                    strings,
+                    data: Any = True,
+                    proc = None,
+                    proc_args: list|tuple = [],
+                    proc_kwargs: dict = {},
+                    *,
+                    parents: bool = True,
+                    dawg: bool = False,
+                    frozen: bool = False,
+                    bloom: float = 0
+    ):
+        """
+        Build a trie in one pass from an iterable of sorted strings.
+
+        The path of the previous string is kept for every output position of
+        `proc` (the first string it returns, the second, ...), and each new
+        string picks up from the end of the prefix it shares with the
+        previous one in its position. Shared nodes have their counts bumped
+        in place rather than being looked up again from the root. Counts and
+        data come out the same as adding the strings one by one in order -
+        sorting only makes the shared prefixes longer.
+
+        Set `frozen` to get a FrozenTrieson of the result. Other parameters
+        are as for the constructor and `add()`.
+        """
+
+        trie = cls(proc, proc_args, proc_kwargs, parents = parents, dawg = dawg, bloom = bloom)
+
+        if type(strings) == str: strings = [strings]
+
+        # a build only creates objects, so cyclic garbage collection passes
+        # over the growing trie are wasted work
+        collecting = gc.isenabled()
+        gc.disable()
+
+        try:
+            if dawg:
+                trie.add_stream(strings, data)
+            else:
+                trie._add_sorted(strings, data)
+        finally:
+            if collecting: gc.enable()
+
+        return trie.freeze() if frozen else trie
+
+    def _add_sorted(self, strings, data):
+        "Add strings reusing the path of the previous string, see from_sorted()"
+
+        proc, proc_args, proc_kwargs = self._get_proc(None, None, None)
+        root, link, bloom = self._root, self._parents, self._filter
+
+        # Previous string, its nodes (root first) and pending count increments
+        # by proc output position. An increment pending at depth d is owed by
+        # every node on the path down to d, and is only applied to a node
+        # when the node leaves the path, so shared prefixes cost nothing.
+        paths = []
+
+        def flush(nodes, pending, depth):
+            "Apply increments owed by nodes below `depth`, keeping the rest"
+            carry = 0
+            for d in range(len(nodes) - 1, depth, -1):
+                carry += pending[d]
+                nodes[d]._count += carry
+            del nodes[depth + 1:]
+            del pending[depth + 1:]
+            pending[depth] += carry
+
+        try:
+            for word in strings:
+                self.dict.add(word)
+
+                for slot, s in enumerate(proc(word, *proc_args, **proc_kwargs)):
+                    if slot == len(paths): paths.append(['', [root], [0]])
+
+                    path = paths[slot]
+                    previous, nodes, pending = path
+
+                    shared = common_prefix(previous, s)
+
+                    if len(nodes) > shared + 1: flush(nodes, pending, shared)
+                    pending[shared] += 1
+
+                    # the trie is new, so there are no sampling tables to drop
+                    node = nodes[-1]
+                    for c in s[shared:]:
+                        child = node._children.get(c)
+
+                        if child is None:
+                            child = Triesonode(node if link else None, c)
+                            if node._children is _NO_CHILDREN: node._children = {}
+                            node._children[c] = child
+                            if bloom is not None and len(nodes) <= bloom.depth:
+                                bloom.add_prefix(s[:len(nodes)])
+                        else:
+                            child._count += 1
+
+                        node = child
+                        nodes.append(node)
+                        pending.append(0)
+
+                    if not node._term:
+                        for n in nodes: n._words += 1
+                        if bloom is not None: bloom.add_string(s)
+
+                    node.terminate(data)
+
+                    raise_best(nodes, node._term)
+
+                    if len(s) > self._depth: self._depth = len(s)
+
+                    path[0] = s
+        finally:
+            for _, nodes, pending in paths: flush(nodes, pending, 0)
+
+            self._added()
+
     # GET/SET/QUERY METHODS --------------------------------------------------
 
     def add(self,
@@ -45,7 +375,9 @@ class Trieson():
             data: Any = True,
             proc = None,
             proc_args: list|tuple = [],
-            proc_kwargs: dict = {}
+            proc_kwargs: dict = {},
+            *,
+            count: int = 1
     ):
         """
         Add string(s) to Trie, associate with data.
@@ -53,42 +385,504 @@ class Trieson():
         Can pass a list of strings or a single string. `proc` argument
         will preprocess each string, and must return a string or list
         of strings to add.
+
+        `count` adds each string that many times in a single pass, with the
+        same effect on `make()` as adding it repeatedly. Data is applied once.
         """
 
-        # default proc if none
-        proc = proc or self._proc['proc']
-        proc_args = proc_args or self._proc['args']
-        proc_kwargs = proc_kwargs or self._proc['kwargs']
+        if count < 1: raise ValueError('count must be at least 1')
+
+        proc, proc_args, proc_kwargs = self._get_proc(proc, proc_args, proc_kwargs)
 
         # convert to list input
         if type(string) == str: string = [string]
 
-        # add to dict
-        for s in string: self.dict.add(s)
+        try:
+            for s in string: self._add_word(s, data, proc, proc_args, proc_kwargs, count)
+        finally:
+            self._added()
+
+        return self
+
+    def add_counts(self,
+                   counts,
+                   data: Any = True,
+                   proc = None,
+                   proc_args: list|tuple = [],
+                   proc_kwargs: dict = {}
+    ):
+        """
+        Add strings with frequencies, given as a mapping of string -> count
+        or an iterable of (string, count) pairs. Each string is added once
+        with its count (see `add()`).
+        """
+
+        proc, proc_args, proc_kwargs = self._get_proc(proc, proc_args, proc_kwargs)
+
+        if hasattr(counts, 'items'): counts = counts.items()
+
+        try:
+            for s, count in counts:
+                if count < 1: raise ValueError(f'count for {s!r} must be at least 1')
+                self._add_word(s, data, proc, proc_args, proc_kwargs, count)
+        finally:
+            self._added()
+
+        return self
+
+    def add_stream(self,
+                   source,
+                   data: Any = True,
+                   proc = None,
+                   proc_args: list|tuple = [],
+                   proc_kwargs: dict = {},
+                   *,
+                   chunk_size: int = 10000,
+                   progress = None,
+                   mmap: bool = False,
+                   encoding: str = 'utf-8'
+    ):
+        """
+        Add strings from an iterable or a file without loading them all.
+
+        `source` is either an iterable of strings or a path to a text file
+        with one string per line (blank lines are skipped). Files are read
+        line by line, or through a memory map if `mmap` is True. Preprocessed
+        strings go straight into the trie, so memory use doesn't grow with
+        the size of the source.
+
+        If given, `progress` is called with a `Progress` tuple (words added,
+        nodes created, seconds elapsed, words per second) after every
+        `chunk_size` words and once at the end.
+
+        Other parameters are as for `add()`.
+        """
+
+        proc, proc_args, proc_kwargs = self._get_proc(proc, proc_args, proc_kwargs)
+
+        if isinstance(source, (str, os.PathLike)):
+            source = read_lines(source, mmap = mmap, encoding = encoding)
+
+        start = time.perf_counter()
+        words = nodes = 0
+
+        def report():
+            seconds = time.perf_counter() - start
+            progress(Progress(words, nodes, seconds, words / seconds if seconds else 0.0))
+
+        try:
+            for s in source:
+                nodes += self._add_word(s, data, proc, proc_args, proc_kwargs)
+                words += 1
+
+                if progress and not words % chunk_size: report()
+        finally:
+            self._added()
+
+        if progress: report()
+
+        return self
+
+    def add_parallel(self,
+                     source,
+                     data: Any = True,
+                     *,
+                     workers: int = None,
+                     chunk_size: int = 10000,
+                     reducer = None,
+                     mmap: bool = False,
+                     encoding: str = 'utf-8'
+    ):
+        """
+        Add strings from an iterable or a file (see `add_stream()`) using a
+        pool of `workers` processes (default: one per CPU).
+
+        The source is cut into chunks of `chunk_size` strings. Each chunk is
+        built into a partial trie by a worker with this trie's proc and sent
+        back flattened (see `flatten()`), and the partial tries are merged
+        into this one in chunk order (see `merge()`, which `reducer` is
+        passed on to). The result is the same as adding the strings one by
+        one. At most two chunks per worker are in flight, so the source
+        doesn't have to fit in memory.
+
+        Strings, data and the proc are sent to the workers, so they must be
+        picklable. Strings are recorded in an attached log as they are sent.
+        """
+
+        if self._automaton is not None: raise TypeError('dawg tries cannot be merged')
+
+        proc = self._proc
+        workers = workers or os.cpu_count() or 1
+
+        with ProcessPoolExecutor(workers) as pool:
+            # partial tries must be merged in chunk order
+            pending = deque()
+
+            try:
+                for chunk in self._chunks(source, chunk_size, mmap, encoding):
+                    if self._log is not None:
+                        for s in chunk: self._log.append(s, data)
+
+                    pending.append(pool.submit(_build_chunk, chunk, data, proc['proc'], proc['args'],
+                                               proc['kwargs'], self._parents))
+
+                    if len(pending) >= 2 * workers: self._merge(*pending.popleft().result(), reducer)
+
+                while pending: self._merge(*pending.popleft().result(), reducer)
+            finally:
+                for future in pending: future.cancel()
+
+        return self
+
+    def merge(self, other, reducer = None):
+        """
+        Add everything in trie `other` to this one, as if its strings had
+        been added here after the ones already in this trie.
+
+        Node and terminator counts are summed, the word sets joined and the
+        depth updated. Children new to this trie are added in the order of
+        `other`. Where both tries end a string, its data becomes
+        `reducer(mine, theirs)`. The default keeps `theirs` if it's truthy,
+        which is what adding `other`'s strings here would do unless they were
+        added with data functions.
+
+        `other` is left as it was. Merged strings are not recorded in an
+        attached log. Dawg tries can't be merged.
+        """
+
+        if other._automaton is not None: raise TypeError('dawg tries cannot be merged')
+
+        return self._merge(flatten(other._root), other.dict, other._depth, reducer)
+
+    def _merge(self, flat: Flat, strings, depth: int, reducer = None):
+        """
+        Merge trie nodes laid out by `flatten()`, the strings they were
+        built from and their depth, see `merge()`.
+
+        Walks the flattened nodes in pre-order alongside the matching nodes
+        of this trie, creating the missing ones. Subtree totals of every node
+        visited are redone on the way back up.
+        """
+
+        if self._automaton is not None: raise TypeError('dawg tries cannot be merged')
+
+        reducer = reducer or keep_last
+        owner, link, bloom = self._owner, self._parents, self._filter
+        values, counts, sizes, data = flat
+
+        def terminate(node, index):
+            "Add flattened terminator `index` to `node`"
+
+            if node._term:
+                node._term_data = reducer(node._term_data, data.get(index, True))
+            else:
+                node._term_data = data.get(index, True)
+                node._term_at = len(node._children)
+                if bloom is not None: bloom.add_string(''.join(chars))
+
+            node._term += counts[index]
+
+        def done(node):
+            "Redo subtree totals of node"
+
+            best, words = node._term, 1 if node._term else 0
+            for child in node._children.values():
+                if child._best > best: best = child._best
+                words += child._words
+
+            node._best, node._words = best, words
+
+        if self._root._owner is not owner:
+            self._root = self._root.copy(owner)
+            self._copied = True
+
+        root = self._root
+        root._tables = None
+
+        chars = [] # characters on the path to the current node
+        stack = [root] # nodes on the path to the current node
+        left = [sizes[0]] # flattened children still to merge, per node on the path
+
+        # only creates objects, see from_sorted()
+        collecting = gc.isenabled()
+        gc.disable()
+
+        try:
+            for index in range(1, len(values)):
+                # back up to the parent of this node
+                while not left[-1]:
+                    done(stack.pop())
+                    left.pop()
+                    chars.pop()
+
+                left[-1] -= 1
+                parent = stack[-1]
+                c = values[index]
+
+                if c == TERMINATOR:
+                    terminate(parent, index)
+                    continue
+
+                chars.append(c)
+
+                node = parent._children.get(c)
+
+                if node is None:
+                    node = Triesonode(parent if link else None, c)
+                    node._count = counts[index]
+                    node._owner = owner
+                    if parent._children is _NO_CHILDREN: parent._children = {}
+                    parent._children[c] = node
+
+                    if bloom is not None and len(chars) <= bloom.depth: bloom.add_prefix(''.join(chars))
+                else:
+                    if node._owner is not owner:
+                        node = parent._children[c] = node.copy(owner, parent if link else None)
+                        self._copied = True
+
+                    node._count += counts[index]
+                    node._tables = None
+
+                stack.append(node)
+                left.append(sizes[index])
+
+            while stack: done(stack.pop())
+        finally:
+            if collecting: gc.enable()
+
+        self.dict |= strings
+
+        if depth > self._depth: self._depth = depth
 
-        # apply proc function
-        string = [ps for s in string for ps in proc(s, *proc_args, **proc_kwargs)]
+        self._added()
+
+        return self
+
+    def _get_proc(self, proc, proc_args, proc_kwargs):
+        "Fill in preprocessing function and arguments from defaults"
+
+        return (
+            proc or self._proc['proc'],
+            proc_args or self._proc['args'],
+            proc_kwargs or self._proc['kwargs']
+        )
+
+    def _add_word(self, word, data, proc, proc_args, proc_kwargs, count = 1) -> int:
+        """
+        Add one string and its preprocessed strings `count` times, and log
+        it once it is in. Returns number of nodes created.
+        """
+
+        if self._log is None: return self._insert(word, data, proc, proc_args, proc_kwargs, count)
+
+        defaults = self._proc
+        if proc is defaults['proc'] and proc_args == defaults['args'] and proc_kwargs == defaults['kwargs']:
+            record = self._log.encode(word, data, count)
+        else:
+            record = self._log.encode(word, data, count, (proc, proc_args, proc_kwargs))
+
+        # a string that fails to go in would fail every replay of the log
+        created = self._insert(word, data, proc, proc_args, proc_kwargs, count)
+        self._log.write(record)
+
+        return created
+
+    def _insert(self, word, data, proc, proc_args, proc_kwargs, count = 1) -> int:
+        "Add one string to the trie without logging it, see `_add_word()`"
+
+        self.dict.add(word)
+
+        bloom = self._filter
+
+        if self._automaton is not None:
+            if proc is not combos.seq_to_end:
+                raise ValueError('dawg mode needs combos.seq_to_end preprocessing')
+
+            if bloom is not None:
+                for s in proc(word, *proc_args, **proc_kwargs): bloom.add_all(s)
+
+            states = len(self._automaton)
+            depth = self._automaton.add(word, data, count)
+            if depth > self._depth: self._depth = depth
+
+            return len(self._automaton) - states
+
+        created = 0
+        owner, link = self._owner, self._parents
+
+        # nodes shared with another version are copied before they change
+        if self._root._owner is not owner:
+            self._root = self._root.copy(owner)
+            self._copied = True
 
         # add characters for each string
-        for s in string:
+        for s in proc(word, *proc_args, **proc_kwargs):
             node = self._root
+            path = [node]
 
-            depth = 0
             for c in s:
-                node = node.add(c)
-                depth += 1
+                child = node._children.get(c)
+                if child is None:
+                    created += 1
+                    if bloom is not None and len(path) <= bloom.depth:
+                        bloom.add_prefix(s[:len(path)])
+                elif child._owner is not owner:
+                    node._children[c] = child.copy(owner, node if link else None)
+                    self._copied = True
+                node = node.add(c, link=link, count=count)
+                path.append(node)
 
-            node.terminate(data)
+            # a new string to count in every subtree on its path
+            if not node._term:
+                for n in path: n._words += 1
+                if bloom is not None: bloom.add_string(s)
 
-            if depth > self._depth: self._depth = depth
+            node.terminate(data, count)
 
-        return self
+            raise_best(path, node._term)
+
+            if len(s) > self._depth: self._depth = len(s)
+
+        return created
+
+    def _added(self):
+        "Update indexes after strings are added"
+
+        # automaton states may have been split, and nodes shared with other
+        # versions copied, so nodes held by the index and cache are stale
+        stale = self._automaton is not None or self._copied
+        self._copied = False
+
+        if stale:
+            self._suffixes = None
+        elif self._suffixes:
+            # new strings may fill in suffix links that were missing
+            self._suffixes.invalidate()
+
+        if self._cache is not None:
+            self._cache.invalidate(found = stale)
+
+        if self._filter is not None and self._filter.full(): self._refilter()
+
+    def _refilter(self):
+        """
+        Replace the Bloom filter with one sized for four times the strings
+        and prefixes now in the trie, filled in one walk over the trie. Each
+        rebuild walks four times as many strings as the last, which works out
+        to a constant per string over a trie's growth.
+        """
+
+        depth = self._filter.depth
+
+        strings = []
+        prefixes = []
+
+        if self._automaton is None:
+            # walk the children dicts directly, which is much cheaper than a
+            # traversal through the node interface
+            stack = [(self._root, '')]
+            while stack:
+                node, s = stack.pop()
+                if node._term: strings.append(s)
+                if s and len(s) <= depth: prefixes.append(s)
+                for c, child in node._children.items(): stack.append((child, s + c))
+        else:
+            chars = []
+
+            def pre(node):
+                chars.append(node._value)
+
+            def post(node):
+                chars.pop()
+
+            for node in self._root.traverse(pre, post):
+                if node.is_terminator(): strings.append(''.join(chars))
+                elif len(chars) <= depth: prefixes.append(''.join(chars))
+
+        bloom = TrieFilter(self._filter.error_rate, depth, 4 * len(strings), 4 * len(prefixes))
+
+        for string in strings: bloom.strings.add(string)
+        for prefix in prefixes: bloom.prefixes.add(prefix)
+
+        self._filter = bloom
+
+    def _fork(self):
+        """
+        Get a copy of this trie sharing all its nodes. The copy has its own
+        owner token, so adding to it copies the nodes on the changed paths
+        and leaves this trie as it was. This trie must not be added to
+        afterwards unless it gets a new token too (see `clone()`).
+
+        The word set is shared too, each trie adding to its own layer on top
+        (see WordSet), and so is the Bloom filter: bits set by either trie
+        only make the filter of the other pass a few more strings on to a
+        walk. The copy gets an empty prefix cache of the same size and builds
+        its own suffix index, since both hold nodes this trie may replace.
+        Nothing is copied, apart from word set layers being merged now and
+        then.
+        """
+
+        if self._automaton is not None: raise TypeError('dawg tries cannot share nodes')
+
+        fork = object.__new__(type(self))
+        fork.__dict__.update(self.__dict__)
+
+        fork._owner = object()
+        self.dict, fork.dict = WordSet.fork(self.dict)
+        fork._suffixes = None
+        fork._compaction = None
+        if self._cache is not None: fork._cache = PrefixCache(self._cache.info().maxsize)
+
+        return fork
+
+    def clone(self):
+        """
+        Get a copy of the trie that shares all its nodes with this one.
+
+        Cloning copies nothing (see `_fork()`). Adding to either trie
+        afterwards copies just the nodes on the paths of the added strings,
+        leaving the other trie as it was, and adds the strings to a word set
+        layer of its own, so each costs memory in proportion to what is added
+        to it. Nodes still shared keep their parent link into this trie. The
+        clone has no log attached. Dawg tries can't be cloned.
+        """
+
+        clone = self._fork()
+        clone._log = None
+
+        # this trie no longer owns the shared nodes either
+        self._owner = object()
+
+        return clone
+
+    def _suffix_index(self):
+        "Get suffix link index, creating it if needed"
+
+        if self._suffixes is None: self._suffixes = SuffixIndex(self._root)
+
+        return self._suffixes
 
     def _get_node_at_prefix(self, prefix: str, proc = None):
         "Get node corresponding to final charachter of prefix"
 
         if not prefix: return self._root
 
+        # most prefixes that aren't there are ruled out by the filter
+        if self._filter is not None and not self._filter.may_have_prefix(prefix): return None
+
+        return self._lookup_prefix(prefix, proc)
+
+    def _lookup_prefix(self, prefix: str, proc = None):
+        "Get node at prefix through the cache, see _get_node_at_prefix()"
+
+        if self._cache is not None and not proc:
+            return self._cache.lookup(prefix, self._find_prefix)
+
+        return self._find_prefix(prefix, proc)
+
+    def _find_prefix(self, prefix: str, proc = None):
+        "Walk prefix from the root node, see _get_node_at_prefix()"
+
         # start at root node
         node = self._root
 
@@ -108,13 +902,97 @@ class Trieson():
     def has(self, string):
         "See if string is in Trie"
 
-        node = self._root
-        for char in string:
-            node = node[char]
-            if not node:
-                return False
+        # the string filter is the better test, so skip the prefix one. The
+        # walk bypasses the prefix cache, which misses would otherwise fill
+        # with entries that push out the prefixes make() and match() reuse
+        if self._filter is not None and not self._filter.may_have(string): return False
+
+        node = self._find_prefix(string)
+
+        return node is not None and node.has_terminator()
+
+    def has_many(self, strings) -> list:
+        """
+        See which of strings are in Trie. Returns a list of booleans in input
+        order. Cheaper than calling `has()` on each when strings share
+        prefixes, see `_find_many()`.
+        """
+
+        strings = list(strings)
+
+        return [node is not None and node.has_terminator() for node in self._find_many(strings)]
+
+    def get_many(self, strings) -> list:
+        """
+        Get data associated with each of strings (None for strings not in
+        Trie), in input order. See `has_many()`.
+        """
+
+        strings = list(strings)
+        found = []
+
+        for node in self._find_many(strings):
+            terminator = node.get_terminator() if node is not None else None
+            found.append(terminator.data() if terminator is not None else None)
+
+        return found
+
+    def has_stream(self, source, *, chunk_size: int = 10000, mmap: bool = False, encoding: str = 'utf-8'):
+        """
+        Generate (string, in trie) pairs for an iterable of strings or a text
+        file with one string per line (see `add_stream()`), in input order.
+        Strings are looked up `chunk_size` at a time with `has_many()`, so
+        memory use doesn't grow with the size of the source.
+        """
+
+        for chunk in self._chunks(source, chunk_size, mmap, encoding):
+            yield from zip(chunk, self.has_many(chunk))
+
+    def get_stream(self, source, *, chunk_size: int = 10000, mmap: bool = False, encoding: str = 'utf-8'):
+        "Generate (string, data) pairs, see `has_stream()` and `get_many()`"
+
+        for chunk in self._chunks(source, chunk_size, mmap, encoding):
+            yield from zip(chunk, self.get_many(chunk))
+
+    def _chunks(self, source, chunk_size, mmap, encoding):
+        "Generate lists of up to chunk_size strings from a source, see has_stream()"
+
+        if isinstance(source, (str, os.PathLike)):
+            source = read_lines(source, mmap = mmap, encoding = encoding)
+
+        source = iter(source)
+
+        while True:
+            chunk = list(islice(source, chunk_size))
+            if not chunk: return
+            yield chunk
+
+    def _find_many(self, strings: list) -> list:
+        "Get the node at each of strings (None if missing), see `walk_sorted()`"
+
+        plain = self._automaton is None # Triesonodes, whose dicts can be used directly
+
+        def extend(path, rest):
+            node = path[-1]
+            for c in rest:
+                node = node._children.get(c) if plain else node.get(c)
+                if node is None: return None
+                path.append(node)
+            return node
+
+        return walk_sorted(strings, self._root, extend, self._filter)
+
+    def cache_info(self) -> CacheInfo:
+        """
+        Get hits, misses, maximum and current size of the prefix cache (all 0
+        if there is no cache)
+        """
+        if self._cache is None: return CacheInfo(0, 0, 0, 0)
+        return self._cache.info()
 
-        return node.has_terminator()
+    def cache_clear(self):
+        "Empty the prefix cache and reset its statistics"
+        if self._cache is not None: self._cache.clear()
 
     def get(self, string=None):
         "Get data associated with string"
@@ -133,42 +1011,198 @@ class Trieson():
 
     def substrings(self, prefix = None, limit = None):
         "Collect and return all substrings"
-        string = ''
-        collection = []
-        count = 0
-        limit = limit if limit else 0
         root = self._get_node_at_prefix(prefix) if prefix else self._root
 
-        # preprocessing function to add letter to string and check for word
-        def preproc(node):
-            nonlocal string, collection, count
+        if root is None: return []
 
-            # add character to string (terminating character is '')
-            string += node._value
+        return list(islice(self._strings(root), limit or None))
 
-            if node.is_terminator():
-                # if we've reached a terminating node, add string to collection
-                collection.append(string)
-                count += 1
+    def _strings(self, node, after = ()):
+        """
+        Generate strings below node, in traversal order. Pass a string's
+        characters plus the terminating character as `after` to resume after
+        that string.
+        """
 
-        # postprocessing function to remove letter from string
-        def postproc(node):
-            # only process if we're not at a terminating node
-            if not node.is_terminator():
-                nonlocal string
-                string = string[:-1]
+        # characters on the path to the current node
+        chars = []
 
-        for _ in root.traverse(preproc, postproc):
-            if limit and count >= limit: break
+        # add letter on the way down (terminating character is ''), remove
+        # it on the way back up
+        def preproc(node):
+            chars.append(node._value)
 
-        return collection
+        def postproc(node):
+            chars.pop()
+
+        for node in node.traverse(preproc, postproc, after = after):
+            # if we've reached a terminating node, the path is a string
+            if node.is_terminator(): yield ''.join(chars)
 
     def match(self, string, limit=None):
         "Get possible matches to string, max <limit>"
 
         if not self.has_prefix(string): return [string]
 
-        return [string + sub for sub in self.substrings(string, limit)]
+        return list(islice(self.iter_matches(string), limit or None))
+
+    def iter_matches(self, prefix: str = ''):
+        "Generate strings starting with prefix, lazily"
+
+        root = self._get_node_at_prefix(prefix)
+        if root is None: return
+
+        for s in self._strings(root): yield prefix + s
+
+    def match_page(self, prefix: str = '', limit: int = 10, cursor: Optional[str] = None):
+        """
+        Get a page of at most `limit` strings starting with prefix, and a
+        cursor for the next page (None if there are no more). Pass the cursor
+        back to get the next page; it picks up where the last page ended
+        rather than scanning the earlier strings again. Cursors stay valid as
+        strings are added, although strings added behind a cursor won't be
+        seen.
+        """
+
+        root = self._get_node_at_prefix(prefix)
+        if root is None: return [], None
+
+        after = ()
+        if cursor is not None:
+            if not cursor.startswith(prefix): raise ValueError('cursor is not from this prefix')
+            after = [*cursor[len(prefix):], TERMINATOR]
+
+        strings = self._strings(root, after)
+
+        page = [prefix + s for s in islice(strings, limit)]
+
+        # only hand out a cursor if there is something after it
+        if not page or next(strings, None) is None: return page, None
+
+        return page, page[-1]
+
+    def top_k(self, prefix: str = '', k: int = 10):
+        """
+        Get the (at most) k most frequent strings starting with prefix, most
+        frequent first. Ties keep traversal order.
+
+        Runs a best-first search ordered by each node's highest terminator
+        count below it, so only the branches leading to the results are
+        opened up.
+        """
+
+        root = self._get_node_at_prefix(prefix)
+        if root is None or k <= 0: return []
+
+        # (negated best count, push order to break ties, node, string)
+        heap = [(-root._best, 0, root, prefix)]
+        pushed = 1
+        found = []
+
+        while heap and len(found) < k:
+            _, _, node, string = heappop(heap)
+
+            if node.is_terminator():
+                found.append(string)
+                continue
+
+            for child in node:
+                heappush(heap, (-child._best, pushed, child, string + child._value))
+                pushed += 1
+
+        return found
+
+    def count_prefix(self, prefix: str = '') -> int:
+        "Count strings starting with prefix"
+
+        node = self._get_node_at_prefix(prefix)
+
+        return node._words if node is not None else 0
+
+    def sample_existing(self, prefix: str = '', n: int = 1, by_frequency: bool = False) -> list:
+        """
+        Get `n` random strings starting with prefix, chosen from the strings
+        stored in the trie (with replacement). Each string is equally likely,
+        or weighted by the number of times it was added if `by_frequency`.
+
+        Each pick descends from the prefix by the subtree string counts kept
+        on every node, so it costs one step per character rather than an
+        enumeration of the matches.
+        """
+
+        root = self._get_node_at_prefix(prefix)
+        if root is None or not root._words: return []
+
+        rand = random.random
+        samples = []
+
+        for _ in range(n):
+            node, chars = root, [prefix]
+
+            while True:
+                if by_frequency:
+                    # child counts are frequency totals of their subtrees,
+                    # so the sampling table already has the right weights
+                    table = node.table()
+                    node = table[0][pick_index(table, 0, rand)]
+                else:
+                    children = list(node)
+                    node = random.choices(children, [child._words for child in children])[0]
+
+                if node.is_terminator(): break
+
+                chars.append(node._value)
+
+            samples.append(''.join(chars))
+
+        return samples
+
+    def index_of(self, string: str) -> int:
+        """
+        Get the rank of string among the strings in the trie in character
+        order, counting from 0. Raises ValueError if string isn't in the trie.
+
+        Ranks shift as strings are added, so they only make stable ids for a
+        trie that is no longer changing, such as a FrozenTrieson.
+        """
+
+        node, rank = self._root, 0
+
+        for char in string:
+            # every string through a smaller sibling comes first, as does a
+            # string ending here (its terminating character '' is smallest)
+            for child in node:
+                if child._value < char: rank += child._words
+
+            node = node.get(char)
+            if node is None: break
+        else:
+            if node.has_terminator(): return rank
+
+        raise ValueError(f'{string!r} is not in trie')
+
+    def word_at(self, rank: int) -> str:
+        """
+        Get the string with the given rank (see `index_of()`). Negative ranks
+        count from the end. Raises IndexError if out of range.
+        """
+
+        node = self._root
+
+        if rank < 0: rank += node._words
+        if not 0 <= rank < node._words: raise IndexError('rank out of range')
+
+        chars = []
+
+        while True:
+            for child in sorted(node, key = lambda child: child._value):
+                if rank < child._words: break
+                rank -= child._words
+
+            if child.is_terminator(): return ''.join(chars)
+
+            chars.append(child._value)
+            node = child
 
     def make(self,
              prefix: str = '',
@@ -240,142 +1274,374 @@ class Trieson():
         if max_len and max_len < min_len:
             max_len, min_len = min_len, max_len # swap them
 
-        # characters will be stores as dict in form:
-        # { "char": <the character>, "tried": <children accessed from this character> }
-
-        # helper function to generate word entries
-        def char(char):
-            return { "char": char, "tried": set() }
-
-        # helper function to join characters
-        def join_word(word_list):
-            return ''.join([w['char'] for w in word_list])
-
-        backtrack_count = 0
-        plist = [] # stores prefix characters
-        word = [char('')] # stores generated characters - starts with a dummy character
-        cache = '' # stores a copy of word in case of length failure
+        prefix = prefix or ''
 
         # get starting node
-        node = self._get_node_at_prefix(prefix, lambda n: plist.append(char(n._value)))
+        node = self._get_node_at_prefix(prefix)
 
         # return if prefix doesn't exist in trie
         if not node: return ''
 
-        logging.debug(f'START: prefix {join_word(plist)}')
+        return self._generate(node, prefix, weight, lookahead,
+                              max_len, min_len, strict, fail_str, end_char,
+                              random.random)
+
+    def make_many(self,
+                  n: int,
+                  prefix: str = '',
+                  weight: float|int = 1,
+                  lookahead: int = 0,
+                  *,
+                  lazy: bool = False, # return generator instead of list
+                  max_len: int = 0,
+                  min_len: int = 0,
+                  strict: bool = True,
+                  fail_str: str = '',
+                  end_char: str = ''
+    ):
+        """
+        Make `n` random words with the same parameters.
 
-        lookahead = [lookahead for _ in range(2)]
+        Equivalent to calling `make()` `n` times, but resolves the prefix and
+        checks the arguments once, and shares sampling tables across words.
+        When NumPy is installed, random numbers are drawn in bulk (seeded
+        from the `random` module, so `random.seed()` still makes results
+        repeatable).
 
-        while True:
-            # 0. word list needs at least one character otherwise no way to
-            #    generate a complete word
-            if not word:
-                logging.debug(f'no further options for generation with min_len {min_len} and max_len {max_len}')
-
-                if strict:
-                    if fail_str and cache: return fail_str + prefix + cache
-                    return ''
-                else:
-                    return prefix + cache
+        Returns a list, or a generator if `lazy` is True. See `make()` for
+        the other parameters.
+        """
 
-            # 1. set lookahead - can't be more than word length
-            if lookahead[1] and len(plist) + len(word) + 1 < lookahead[1]:
-                lookahead[1] = len(plist) + len(word) + 1
+        if max_len and max_len < min_len:
+            max_len, min_len = min_len, max_len
 
-            # 2a. update prefix to find next letter
-            prefix = join_word((plist + word))[-lookahead[1]:]
+        prefix = prefix or ''
 
-            # 2b. get node corresponding to last char of prefix
-            node = self._get_node_at_prefix(prefix)
+        node = self._get_node_at_prefix(prefix) if len(self._root) else None
 
+        def generate():
             if not node:
-                # prefix does not exist in trie
-                # increase lookahead to see if we can get a hit
-                # needed in event we have i.e. one string in trie, proc
-                # combos.none, and lookahead less than string length
+                for _ in range(n): yield ''
+                return
 
-                logging.debug(f'* no children for prefix {join_word(word)} with lookahead {lookahead}')
+            rand = bulk_random(max(16, min(n, 1024) * 8))
 
-                if lookahead[1] >= len(word) - 1 + len(plist):
-                    # can't get any more characters from the trie
-                    if strict:
-                        if fail_str and cache: return fail_str + prefix + cache
-                        return ''
-                    else:
-                        return prefix + cache
+            for _ in range(n):
+                yield self._generate(node, prefix, weight, lookahead,
+                                     max_len, min_len, strict, fail_str, end_char,
+                                     rand)
+
+        return generate() if lazy else list(generate())
+
+    def _generate(self, node, prefix, weight, lookahead,
+                  max_len, min_len, strict, fail_str, end_char, rand):
+        """
+        Generation engine behind make(), starting from `node`, the node at the
+        end of `prefix`. Draws random numbers from `rand`.
+
+        The word is built on an explicit stack with one entry for the prefix
+        and one for each generated character. Each entry keeps the node used
+        to pick the next character (the trie path with no lookahead, or the
+        window of the last `lookahead` characters otherwise) and a bitmask of
+        the children already tried from it, indexed by the node's sampling
+        table. Backtracking just pops entries.
+        """
+
+        # skip debug messages entirely unless they'll be seen
+        debug = logging.getLogger().isEnabledFor(logging.DEBUG)
+
+        if debug: logging.debug('START: prefix %s', prefix)
+
+        index = self._suffix_index() if lookahead else None
 
-                    break
+        text = list(prefix) # prefix and generated characters
+        plen = len(text)
+        nodes = [node] # node to pick the next character from, per entry
+        sizes = [plen] # window size nodes were found for (-1 if not yet)
+        masks = [0] # children tried from each entry, as bits of table
+        tables = [None] # sampling table the tried bits refer to
+        cache = '' # stores a copy of word in case of length failure
+        current = lookahead # lookahead in effect
+
+        def pop():
+            if len(nodes) > 1: text.pop()
+            nodes.pop(); sizes.pop(); masks.pop(); tables.pop()
+
+        def fail():
+            if strict:
+                if fail_str and cache: return fail_str + prefix + cache
+                return ''
+
+            return prefix + cache
+
+        while True:
+            # 0. need at least one entry otherwise no way to generate a
+            #    complete word
+            depth = len(nodes)
+            if not depth:
+                if debug: logging.debug('no further options for generation with min_len %s and max_len %s', min_len, max_len)
+                return fail()
+
+            length = plen + depth - 1
+
+            # 1. get node to pick from
+            if not current:
+                node = nodes[-1]
+            else:
+                # lookahead can't be more than word length
+                if plen + depth + 1 < current: current = plen + depth + 1
+                size = min(current, length)
 
+                if sizes[-1] == size:
+                    node = nodes[-1]
                 else:
-                    # increase lookahead
-                    logging.debug(f'\tincreasing effective lookahead from {lookahead[1]} to {lookahead[1] + 1}')
-                    lookahead[1] += 1
+                    # slide window on from previous entry, or walk from root
+                    node = None
+                    if depth > 1 and nodes[-2] is not None and 0 <= sizes[-2] and size <= sizes[-2] + 1:
+                        node = index.slide(nodes[-2], sizes[-2], text[-1], size)
+                    if node is None:
+                        node = index.walk(''.join(text[len(text) - size:]) if size else '')
+                    nodes[-1] = node
+                    sizes[-1] = size
+
+                if node is None:
+                    # window does not exist in trie - increase lookahead to
+                    # see if we can get a hit. needed in event we have i.e.
+                    # one string in trie, proc combos.none, and lookahead
+                    # less than string length
+                    if debug: logging.debug('* no children for window with lookahead %s', current)
+
+                    # can't get any more characters from the trie
+                    if current >= length: return fail()
 
+                    current += 1
                     continue
-            else:
-                # reset lookahead
-                lookahead[1] = lookahead[0]
-
-            # 2c. get next node
-            logging.debug(f'getting next char with prefix "{prefix}" and tried characters {word[-1]["tried"] if word else set()}')
-
-            node = node.get(weight = weight, exclude_chars = word[-1]["tried"] if word else set())
-
-            # 2d. check if node exists
-            if node and not node.is_terminator():
-                # exists so add character to word
-                if word: word[-1]["tried"].add(node._value)
-                word.append(char(node._value))
-                logging.debug(f'> added {node._value} for prefix {prefix}')
-            elif not node:
-                # node not existing means we've exhausted all options
-                # so remove character in hopes that previous character will
-                # have more options
-                word.pop()
+
+                current = lookahead
+
+            # 2. pick next node, skipping children already tried
+            table = node.table(weight)
+            mask = masks[-1]
+            if tables[-1] is not table:
+                if mask: mask = remap(mask, tables[-1], table)
+                tables[-1] = table
+
+            ix = pick_index(table, mask, rand)
+
+            if ix < 0:
+                # exhausted all options so remove character in hopes that
+                # previous character will have more options
+                pop()
                 continue
 
+            node = table[0][ix]
+            terminal = node.is_terminator()
+
+            if not terminal:
+                # add character to word
+                masks[-1] = mask | (1 << ix)
+                text.append(node._value)
+                nodes.append(node if not lookahead else None)
+                sizes.append(length + 1 if not lookahead else -1)
+                masks.append(0)
+                tables.append(None)
+                length += 1
+                if debug: logging.debug('> added %s', node._value)
+
             # cache word if we've reached max length
-            # TODO: wrap this into stop condition check
-            if max_len and len(word) - 1 + len(plist) == max_len:
-                cache = join_word(word)
-                logging.debug(f'\t> cached "{cache}"')
+            if max_len and length == max_len:
+                cache = ''.join(text[plen:])
 
             # 3. check for stop condition
-            if node.is_terminator() or (end_char and node._value == end_char):
-                # at terminating node - check if we can end here
-                logging.debug(f'reached terminating node at prefix {prefix}')
-
+            if terminal or (end_char and node._value == end_char):
                 # 3a. check if word is too small
-                if min_len and (len(word) - 1 + len(plist)) < min_len:
-                    logging.debug(f'* word "{"".join([c["char"] for c in word])}" is too short')
+                if min_len and length < min_len:
+                    if debug: logging.debug('* word is too short')
 
                     # add to cache if larger than previous cached word
-                    if len(cache) < len(word) - 1 + len(plist):
-                        cache = join_word(word)
-                        logging.debug(f'\t> cached "{cache}"')
+                    if len(cache) < length: cache = ''.join(text[plen:])
 
                     # remove character from word to try another
-                    word.pop()
+                    pop()
                     continue
 
                 # 3b. check if word is too big
-                if max_len and (len(word) - 1 + len(plist)) > max_len:
-                    logging.debug(f'* word "{"".join([c["char"] for c in word])}" is too long')
+                if max_len and length > max_len:
+                    if debug: logging.debug('* word is too long')
 
                     # add to cache if smaller than previous cached word
-                    if not cache or len(word) - 1 + len(plist) < len(cache):
-                        cache = join_word(word)
-                        logging.debug(f'\t> cached "{cache}"')
-
-                    # shorten word to 1 less than max length to try another character
-                    word = word[:max_len - len(plist)]
+                    if not cache or length < len(cache): cache = ''.join(text[plen:])
+
+                    # shorten word to 1 less than max length to try another
+                    # character
+                    # with a prefix longer than max_len the old negative slice
+                    # backed off plen - max_len characters instead of all of them
+                    keep = max_len - plen if max_len >= plen else max(len(nodes) + max_len - plen, 0)
+                    while len(nodes) > keep: pop()
                     continue
 
-                return join_word(plist + word)
+                return ''.join(text)
 
     def depth(self):
         return self._depth
 
+    def freeze(self):
+        """
+        Return a read-only, array-backed snapshot of the trie.
+
+        The snapshot supports all query methods (`has`, `has_prefix`, `get`,
+        `substrings`, `match`, `make`, ...) with a fraction of the memory.
+        Later additions to this trie are not reflected in the snapshot.
+        """
+        from .FrozenTrieson import FrozenTrieson
+
+        return FrozenTrieson(self)
+
+    def save(self, path):
+        """
+        Write trie to `path` in the binary snapshot format: a frozen copy of
+        the nodes, counts, terminator data, depth, word set and proc
+        configuration, plus the suffix automaton of a dawg trie so that it
+        thaws back into one. Read it back with `load()`.
+        """
+        self.freeze().save(path)
+
+    @classmethod
+    def load(cls, path, mmap: bool = True, *, cache_size: int = 0):
+        """
+        Read a trie written by `save()` as a FrozenTrieson. Call `thaw()` on
+        the result to get a trie that can be added to.
+
+        With `mmap` the file is memory mapped rather than read, so loading
+        takes about as long as decoding the node labels, and node counts are
+        paged in from the file as they are used.
+
+        `cache_size` sets up a prefix cache, as in the constructor.
+        """
+        from .FrozenTrieson import FrozenTrieson
+
+        with open(path, 'rb') as f:
+            buffer = _mmap.mmap(f.fileno(), 0, access = _mmap.ACCESS_READ) if mmap else f.read()
+
+        trie = FrozenTrieson.from_buffer(buffer)
+        if cache_size: trie._cache = PrefixCache(cache_size)
+
+        return trie
+
+    def attach_log(self, log, **options):
+        """
+        Record every string added from now on in an append-only log, given as
+        a TriesonLog or a path (with `options` for TriesonLog). Pass None to
+        detach. Returns the log.
+        """
+
+        if log is not None and not isinstance(log, TriesonLog):
+            log = TriesonLog(log, **options)
+
+        self._log = log
+
+        return log
+
+    def compact(self, snapshot, *, background: bool = True):
+        """
+        Fold the log into a new snapshot at `snapshot` (see `save()`).
+
+        The log is rotated and a copy of the trie taken right away: a clone
+        (see `clone()`), or for dawg tries a pickle of the automaton. Freezing
+        that copy, writing the snapshot and then deleting the log segments it
+        contains happens on a separate thread unless `background` is False.
+        Strings added in the meantime go to the new log generation. Returns
+        the thread, which can be joined to wait for the snapshot.
+        """
+
+        if self._log is None: raise ValueError('compact() needs a log, see attach_log()')
+
+        # one compaction at a time
+        if self._compaction is not None: self._compaction.join()
+
+        log = self._log
+        generation = log.rotate()
+
+        if self._automaton is None:
+            version = self.clone()
+            automaton = None
+        else:
+            # automaton states change in place, so they can't be shared
+            version = object.__new__(type(self))
+            version.__dict__.update(self.__dict__)
+            self.dict, version.dict = WordSet.fork(self.dict)
+            version._log = version._compaction = None
+            automaton = pickle.dumps(self._automaton, pickle.HIGHEST_PROTOCOL)
+
+        def run():
+            if automaton is not None:
+                version._automaton = pickle.loads(automaton)
+                version._root = version._automaton.root()
+
+            frozen = version.freeze()
+            frozen._log_generation = generation
+            frozen.save(snapshot)
+            for old, segment in segments(log.path):
+                if old < generation: os.remove(segment)
+
+        self._compaction = threading.Thread(target = run, name = 'Trieson compaction')
+        self._compaction.start()
+        if not background: self._compaction.join()
+
+        return self._compaction
+
+    @classmethod
+    def recover(cls, snapshot, log,
+                proc = None,
+                proc_args: list|tuple = [],
+                proc_kwargs: dict = {},
+                *,
+                dawg: bool = False,
+                **options
+    ):
+        """
+        Rebuild a trie from the snapshot written by `compact()` (or `save()`)
+        and the log generations it doesn't contain, then attach the log
+        (with `options` for TriesonLog) so adding can carry on. A snapshot of
+        a dawg trie gives a dawg trie.
+
+        If `snapshot` doesn't exist yet, the whole log is replayed into a new
+        trie made with `proc`, `proc_args`, `proc_kwargs` and `dawg`. The
+        same proc is needed if the snapshot couldn't store the trie's own
+        (see `FrozenTrieson.to_bytes()`), and a ValueError is raised if it
+        is missing, rather than replaying with the wrong one.
+        """
+
+        if snapshot is not None and os.path.exists(snapshot):
+            frozen = cls.load(snapshot, mmap = False)
+
+            if frozen._proc['proc'] is None:
+                if proc is None: raise ValueError(f'{snapshot} has no proc stored, pass the proc the trie was made with')
+                frozen._proc = { 'proc': proc, 'args': proc_args, 'kwargs': proc_kwargs }
+
+            trie = frozen.thaw()
+            start = frozen._log_generation
+        else:
+            trie = cls(proc, proc_args, proc_kwargs, dawg = dawg)
+            start = 0
+
+        files = [path for _, path in segments(log)]
+        if os.path.exists(log): files.append(log)
+
+        try:
+            for path in files:
+                generation, records = read_log(path)
+                if generation < start: continue
+
+                for string, data, count, proc_config in records:
+                    trie._add_word(string, data, *(proc_config or trie._get_proc(None, None, None)), count)
+        finally:
+            trie._added()
+
+        trie.attach_log(log, **options)
+
+        return trie
+
     # MAGIC ------------------------------------------------------------------
 
     def __contains__(self, string):
@@ -396,8 +1662,24 @@ class Trieson():
 
     def __iter__(self):
         "Iterate through all strings in Trie"
-        for s in self.substrings():
-            yield s
+        return self._strings(self._root)
+
+    # PICKLING ---------------------------------------------------------------
+
+    def __getstate__(self):
+        "Pickle without the owner token, log or compaction thread"
+
+        state = self.__dict__.copy()
+
+        # unpickled nodes belong to no version (see Triesonode), so neither
+        # does the unpickled trie, or it would copy every node it changes
+        state['_owner'] = None
+
+        # the log belongs to the trie it was attached to, see attach_log()
+        state['_log'] = None
+        state['_compaction'] = None
+
+        return state
 
     # STRING -----------------------------------------------------------------
 
@@ -0,0 +1,226 @@
+""" TriesonLog.py
+----------------
+Append-only log of strings added to a Trieson, for recovery after a crash
+"""
+
+import glob
+import os
+import pickle
+import struct
+import threading
+import time
+import zlib
+
+MAGIC = b'TRSNLOG'
+VERSION = 1
+
+_HEADER = struct.Struct('<7sBQ') # magic, version, generation
+_RECORD = struct.Struct('<II') # payload length, crc32 of payload
+
+def read_log(path):
+    """
+    Get (generation, records) from a log file. Records are (string, data,
+    count, proc) tuples, where proc is None for the trie's own proc or a
+    (proc, proc_args, proc_kwargs) tuple.
+
+    Reading stops at the first incomplete or corrupt record, which is what a
+    crash in the middle of a write leaves behind.
+    """
+
+    with open(path, 'rb') as f:
+        generation = _read_header(f, path)
+        records = []
+
+        while True:
+            record = _read_record(f)
+            if record is None: break
+            records.append(record)
+
+    return generation, records
+
+def _read_header(f, path) -> int:
+    header = f.read(_HEADER.size)
+
+    if len(header) < _HEADER.size: raise ValueError(f'{path} is not a Trieson log')
+
+    magic, version, generation = _HEADER.unpack(header)
+
+    if magic != MAGIC: raise ValueError(f'{path} is not a Trieson log')
+
+    if version > VERSION:
+        raise ValueError(f'Trieson log version {version} is newer than supported version {VERSION}')
+
+    return generation
+
+def _read_record(f):
+    "Read the next record, or None at the end of the valid part of the log"
+
+    head = f.read(_RECORD.size)
+    if len(head) < _RECORD.size: return None
+
+    length, crc = _RECORD.unpack(head)
+
+    payload = f.read(length)
+    if len(payload) < length or zlib.crc32(payload) != crc: return None
+
+    return pickle.loads(payload)
+
+def segments(path) -> list:
+    "Get (generation, path) of the rotated segments of a log, oldest first"
+
+    found = []
+    for segment in glob.glob(glob.escape(path) + '.*'):
+        suffix = segment[len(path) + 1:]
+        if suffix.isdigit(): found.append((int(suffix), segment))
+
+    return sorted(found)
+
+#--- CLASS DEFINITION -------------------------------------------------------
+
+class TriesonLog:
+    """
+    Append-only log of `add()` calls on a Trieson.
+
+    Each added string is appended as a small length-prefixed, checksummed
+    record once it is in the trie, so a string the trie rejects is never
+    replayed. Its record is encoded before the trie is changed, so data that
+    can't be pickled is rejected first. Records are buffered and flushed to
+    disk with `fsync` once `batch` records have built up or `interval`
+    seconds have passed since the first record after the last sync,
+    whichever comes first, so a crash loses at most that much. A timer
+    thread does the sync if nothing is appended in the meantime. Call
+    `sync()` to force it.
+
+    Every log file has a generation number. `rotate()` closes the current
+    file as a numbered segment (`path.<generation>`) and starts the next
+    generation at `path`, which lets a snapshot record which generations it
+    already contains (see `Trieson.compact()` and `Trieson.recover()`).
+
+    Opening an existing log appends to it, after cutting off any incomplete
+    record at its end.
+
+    Constructor Parameters
+    ----------------------
+    path: str
+        Log file
+    batch: int
+        Number of records between syncs
+    interval: float
+        Maximum seconds between syncs
+    """
+
+    def __init__(self, path, *, batch: int = 1000, interval: float = 1.0):
+        self.path = os.fspath(path)
+        self._batch = batch
+        self._interval = interval
+        self._file = None
+        self._timer = None # thread syncing records left waiting, see append()
+        self._lock = threading.Lock()
+
+        self._open()
+
+    def _open(self, generation: int = 1):
+        "Open log for appending, creating it with `generation` if needed"
+
+        if os.path.exists(self.path):
+            f = open(self.path, 'r+b')
+
+            self.generation = _read_header(f, self.path)
+
+            # drop a record left half written by a crash
+            end = f.tell()
+            while _read_record(f) is not None: end = f.tell()
+            f.truncate(end)
+            f.seek(end)
+        else:
+            f = open(self.path, 'wb')
+            f.write(_HEADER.pack(MAGIC, VERSION, generation))
+            self.generation = generation
+
+        self._file = f
+        self._pending = 0
+        self._synced = time.monotonic()
+
+        self._sync()
+
+    def append(self, string, data = True, count: int = 1, proc = None):
+        "Record a string added to the trie, see `read_log()`"
+        self.write(self.encode(string, data, count, proc))
+
+    @staticmethod
+    def encode(string, data = True, count: int = 1, proc = None) -> bytes:
+        "Get the payload of a record for `write()`, see `append()`"
+        return pickle.dumps((string, data, count, proc), pickle.HIGHEST_PROTOCOL)
+
+    def write(self, payload: bytes):
+        "Append a record encoded by `encode()`"
+
+        with self._lock:
+            self._file.write(_RECORD.pack(len(payload), zlib.crc32(payload)))
+            self._file.write(payload)
+
+            self._pending += 1
+            if self._pending >= self._batch or time.monotonic() - self._synced >= self._interval:
+                self._sync()
+            elif self._timer is None:
+                # sync these records on time even if the writer goes quiet
+                self._timer = threading.Timer(self._interval, self._expire)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def _expire(self):
+        "Sync records that have waited `interval` seconds, run by the timer"
+
+        with self._lock:
+            self._timer = None
+            if self._pending and self._file is not None: self._sync()
+
+    def sync(self):
+        "Flush buffered records to disk"
+        with self._lock: self._sync()
+
+    def _sync(self):
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+        self._pending = 0
+        self._synced = time.monotonic()
+
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+    def rotate(self) -> int:
+        """
+        Close the current file as segment `path.<generation>` and start the
+        next generation. Returns the new generation.
+        """
+
+        with self._lock:
+            self._sync()
+            self._file.close()
+
+            os.replace(self.path, f'{self.path}.{self.generation}')
+
+            self._open(self.generation + 1)
+
+            return self.generation
+
+    def close(self):
+        "Sync and close the log"
+
+        with self._lock:
+            if self._file is None: return
+
+            self._sync()
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *unused):
+        self.close()
+
+    def __repr__(self):
+        return f'TriesonLog({self.path!r})'
@@ -5,11 +5,174 @@ Exports Trie Node class
 
 from __future__ import annotations
 from typing import Optional
-from types import FunctionType
+from types import FunctionType, MappingProxyType
+from itertools import accumulate, islice
+from bisect import bisect
 import random
 
 TERMINATOR = ''
 
+# shared, read-only children mapping for leaf nodes - replaced by a real dict
+# the first time a child is added
+_NO_CHILDREN = MappingProxyType({})
+
+def _update_data(current, data):
+    "Apply `data` to `current` the way Triesonode.data() does"
+    if data is None: return current
+    if isinstance(data, FunctionType): return data(current)
+    return data
+
+def build_table(node, weight: int|float = 1):
+    """
+    Build the sampling table for the children of `node`: a tuple of
+    (child nodes, child values, cumulative weights), where each child is
+    weighted by its count raised to `weight`.
+
+    Works on anything that iterates over its child nodes.
+    """
+
+    children = list(node)
+
+    return (
+        children,
+        tuple(child._value for child in children),
+        list(accumulate(child._count ** weight for child in children))
+    )
+
+def pick_index(table, mask: int = 0, rand = random.random):
+    """
+    Pick a random position from a sampling table (see `build_table`),
+    skipping positions whose bit is set in `mask`. Returns -1 if nothing is
+    left to pick.
+
+    Takes a single random draw and a bisect. Excluded positions are skipped
+    by shrinking the draw range and stepping the draw over their weight
+    intervals, so the table never has to be rebuilt. The pick is the same one
+    `random.choices` would make over the remaining children.
+    """
+
+    cum = table[2]
+
+    if not cum: return -1
+
+    total = cum[-1]
+
+    # lowest excluded positions first
+    excluded = []
+    while mask:
+        low = mask & -mask
+        ix = low.bit_length() - 1
+        if ix >= len(cum): break
+        excluded.append(ix)
+        total -= cum[ix] - (cum[ix - 1] if ix else 0)
+        mask ^= low
+
+    # return -1 if all are excluded
+    if total <= 0: return -1
+
+    r = rand() * total
+
+    # step over excluded intervals lying at or below the draw
+    for ix in excluded:
+        start = cum[ix - 1] if ix else 0
+        if start > r: break
+        r += cum[ix] - start
+
+    return bisect(cum, r, 0, len(cum) - 1)
+
+def exclude_mask(table, exclude_chars = '') -> int:
+    """
+    Get bitmask of positions in a sampling table whose value is in
+    `exclude_chars`. A string of characters also excludes the terminator,
+    since '' is in every string.
+    """
+
+    values = table[1]
+    mask = 0
+
+    for c in exclude_chars:
+        if c in values: mask |= 1 << values.index(c)
+
+    if isinstance(exclude_chars, str) and TERMINATOR in values:
+        mask |= 1 << values.index(TERMINATOR)
+
+    return mask
+
+def remap(mask: int, old, new) -> int:
+    "Translate bitmask of positions in sampling table `old` to table `new`"
+
+    values = old[1]
+    chars = [values[ix] for ix in range(len(values)) if mask >> ix & 1]
+
+    return exclude_mask(new, chars)
+
+def pick(table, exclude_chars = '', rand = random.random):
+    """
+    Pick a random child from a sampling table (see `build_table`), skipping
+    any child whose value is in `exclude_chars`.
+    """
+
+    ix = pick_index(table, exclude_mask(table, exclude_chars), rand)
+
+    return table[0][ix] if ix >= 0 else None
+
+def traverse(node, pre = None, post = None, *, prune = None, max_depth: int = 0, after = ()):
+    """
+    Depth-first, pre-order traversal over all nodes below `node`, run off an
+    explicit stack so it costs the same per node at any depth and never hits
+    the recursion limit.
+
+    `pre` is called on each node just before it is yielded and `post` once
+    everything below it has been. If `prune` returns true for a node, the
+    nodes below it are skipped. With `max_depth`, nodes deeper than that
+    (the children of `node` being at depth 1) are skipped.
+
+    To resume a traversal, pass the values of the nodes on the path to the
+    last node seen (a terminator's value is '') as `after`. Traversal picks
+    up right after that node, as if it had just been yielded, without
+    visiting anything before it; `pre` is called on the path nodes so hooks
+    see the same state. Raises ValueError if the path doesn't exist.
+
+    Works on anything that iterates over its child nodes.
+    """
+
+    stack = [iter(node)] # child iterators, one per level
+    path = [] # node owning each child iterator below the first
+
+    # set up the stack as it was when the last node on the path was yielded
+    for value in after:
+        for child in stack[-1]:
+            if child._value == value: break
+        else:
+            raise ValueError(f'no path {list(after)!r} to resume from')
+
+        if pre: pre(child)
+
+        stack.append(iter(child))
+        path.append(child)
+
+    while stack:
+        child = next(stack[-1], None)
+
+        # level done - back up to the parent level
+        if child is None:
+            stack.pop()
+            if path:
+                done = path.pop()
+                if post: post(done)
+            continue
+
+        if pre: pre(child)
+
+        yield child
+
+        if (max_depth and len(stack) >= max_depth) or (prune and prune(child)):
+            if post: post(child)
+            continue
+
+        stack.append(iter(child))
+        path.append(child)
+
 ###--- TRIESONODE CLASS -----------------------------------------------------
 
 class Triesonode:
@@ -20,51 +183,124 @@ class Triesonode:
     - Getting child nodes by char
     - Checking for existence of children
     - Getting and setting node data
+
+    Nodes use `__slots__` to keep their footprint small. Leaf nodes share a
+    single empty children mapping, and the terminator is stored as a count
+    and data value on the node itself rather than as a separate child object.
+    `get_terminator()` and friends hand out a lightweight
+    `TriesonodeTerminator` view onto those fields. `_term_at` keeps the
+    position the terminator would have had among the children, so nodes
+    iterate in the order their children and terminator were added.
+
+    `_best` holds the highest terminator count in the subtree below (and
+    including) the node, and `_words` the number of distinct strings ending
+    there. Trieson keeps both up to date as strings are added.
+
+    `_owner` is a token for the trie version allowed to change the node in
+    place. Versions sharing nodes copy a node they don't own before changing
+    it (see `copy()`); a plain trie and its nodes all have owner None.
     """
 
+    __slots__ = ('_value', '_count', '_children', '_parent', '_data',
+                 '_term', '_term_data', '_term_at', '_tables', '_best', '_words', '_owner')
+
     #--- CONSTRUCTOR --------------------------------------------------------
 
     def __init__(self, parent: Triesonode = None, value: str = ''):
         self._value = value
         self._count = 1
-        self._children = {}
+        self._children = _NO_CHILDREN
         self._parent = parent
         self._data = None
+        self._term = 0 # terminator count - 0 if not terminated here
+        self._term_data = None
+        self._term_at = 0 # number of children added before the terminator
+        self._tables = None # sampling tables by weight, see table()
+        self._best = 0 # highest terminator count in subtree
+        self._words = 0 # number of strings ending in subtree
+        self._owner = None # trie version that may change the node in place
 
     #--- GET/SET ------------------------------------------------------------
 
-    def add(self, char, chain=True):
-        "Add char to children and return added node"
+    def add(self, char, chain=True, *, link=True, count=1):
+        """
+        Add char to children and return added node
+
+        Set `link` to False to create the child without a reference back to
+        this node (see `parent()`). `count` adds the char that many times.
+        """
 
         # convenience for passing more than one char to add:
         # will add each char to this node (will return this node)
         if len(char) > 1:
             for c in char:
-                self.add(c, chain=False)
+                self.add(c, chain=False, link=link, count=count)
             return self
 
+        # adding the terminating character terminates this node
+        if char == TERMINATOR:
+            self.terminate(count=count)
+            return self.get_terminator() if chain else self
+
+        if self._children is _NO_CHILDREN: self._children = {}
+
+        # child counts are changing - sampling tables are stale
+        self._tables = None
+
         # if char already exists, increment count, else add new node
-        if char in self._children:
-            self._children[char]._count += 1
+        child = self._children.get(char)
+        if child is not None:
+            child._count += count
         else:
-            self._children[char] = Triesonode(self, char)
+            child = self._children[char] = Triesonode(self if link else None, char)
+            child._count = count
+            child._owner = self._owner
 
         # return child if chaining...
-        if chain: return self._children[char]
+        if chain: return child
 
         # ... or set chain to False to get same node back
         return self
 
-    def terminate(self, data = None):
-        "Add a terminating node to children"
+    def terminate(self, data = None, count = 1):
+        """
+        Mark this node as the end of a string, `count` times over. Data is
+        applied once.
+        """
+
+        self._tables = None
 
-        # if no terminating node, create one, else update count and data
-        if TERMINATOR not in self._children:
-            self._children[TERMINATOR] = TriesonodeTerminator(self, data)
+        # if not terminated, start a new count, else update count and data
+        if not self._term:
+            self._term = count
+            self._term_data = _update_data(None, data)
+            self._term_at = len(self._children)
         else:
-            self._children[TERMINATOR]._count += 1
+            self._term += count
             if data:
-                self._children[TERMINATOR].data(data)
+                self._term_data = _update_data(self._term_data, data)
+
+    def copy(self, owner = None, parent: Triesonode = None) -> Triesonode:
+        """
+        Get a copy of this node owned by `owner`, sharing its children (and
+        data) with this one. Children keep their parent link to this node.
+        """
+
+        node = Triesonode.__new__(Triesonode)
+        node._value = self._value
+        node._count = self._count
+        node._children = dict(self._children) if self._children else _NO_CHILDREN
+        node._parent = parent
+        node._data = self._data
+        node._term = self._term
+        node._term_data = self._term_data
+        node._term_at = self._term_at
+        node._tables = None
+        node._best = self._best
+        node._words = self._words
+        node._owner = owner
+
+        return node
 
     def get(self, char: Optional[str] = None, weight: int|float = 1,
             *,
@@ -77,24 +313,29 @@ class Triesonode:
         Can exclude children by passing optional `exclude_chars` argument containing an iterable of characters to exclude.
         """
 
-        # no children? return None
-        if not self._children: return None
-
         # if no char provided, generate one selected from children
-        if char == None:
-            # get children that aren't excluded
-            children = [childnode for childnode in self._children.values() if childnode._value not in exclude_chars]
+        if char == None: return pick(self.table(weight), exclude_chars)
+
+        if char == TERMINATOR:
+            return TriesonodeTerminator(self) if self._term else None
 
-            # return None if all are excluded or no children
-            if not children: return None
+        return self._children.get(char)
 
-            # create weights for random selection
-            weights = [child._count ** weight for child in children if child._value not in exclude_chars]
+    def table(self, weight: int|float = 1):
+        """
+        Get the cached sampling table of this node's children for `weight`.
+
+        Tables are built on first use and dropped whenever this node's
+        children or terminator change.
+        """
 
-            # select by weighted choice
-            char = random.choices(children, weights)[0]._value
+        tables = self._tables
+        if tables is None: tables = self._tables = {}
 
-        return self._children[char] if char in self._children else None
+        table = tables.get(weight)
+        if table is None: table = tables[weight] = build_table(self, weight)
+
+        return table
 
     def has(self, char=None, n=0):
         """
@@ -104,14 +345,19 @@ class Triesonode:
         If no char specified, get list of all child keys.
         """
 
-        if char is None: return list(self._children.keys())
+        if char is None:
+            keys = list(self._children.keys())
+            if self._term: keys.insert(self._term_at, TERMINATOR)
+            return keys
+
+        child = self.get(char)
 
         # standard return
-        if not n: return char in self._children
+        if not n: return child is not None
         # bonus 1: return if count is at most n
-        elif n < 0: return char in self._children and self._children[char]._count <= -n
+        elif n < 0: return child is not None and child._count <= -n
         # bonus 2: return only if count is at least n
-        else: return char in self._children and self._children[char]._count >= n
+        else: return child is not None and child._count >= n
 
     def data(self, data=None):
         """
@@ -122,22 +368,17 @@ class Triesonode:
 
         if data is None: return self._data
 
-        if isinstance(data, FunctionType):
-            # call function on data
-            self._data = data(self._data)
-        else:
-            # set data to new value
-            self._data = data
+        self._data = _update_data(self._data, data)
 
         return self
 
     def children(self):
         "Get child nodes as list"
 
-        return list(self._children.values())
+        return list(self)
 
     def parent(self):
-        "Return parent node; will return None if root"
+        "Return parent node; will return None if root or built without links"
 
         return self._parent
 
@@ -146,34 +387,38 @@ class Triesonode:
         return False
 
     def has_terminator(self):
-        "True if terminating node is a child"
-        return TERMINATOR in self
+        "True if this node ends a string"
+        return self._term > 0
 
     def get_terminator(self):
-        "Get terminator child if exists or None"
-        return self[TERMINATOR] if TERMINATOR in self else None
+        "Get terminator view if exists or None"
+        return TriesonodeTerminator(self) if self._term else None
 
     #--- TRAVERSAL ---------------------------------------------------------
 
-    def traverse(self, pre=None, post=None):
-        "Recursive depth-first traversal over all nodes"
-        for node in self._children:
-            child = self._children[node]
+    def traverse(self, pre=None, post=None, *, prune=None, max_depth=0, after=()):
+        "Depth-first traversal over all nodes below this one, see `traverse()`"
+        return traverse(self, pre, post, prune=prune, max_depth=max_depth, after=after)
 
-            # preprocess if exists
-            if pre: pre(child)
+    #--- PICKLING -----------------------------------------------------------
 
-            yield child
-            yield from child.traverse(pre, post)
+    def __getstate__(self):
+        "Pickle without sampling tables, owner or the shared empty children mapping"
+        return (self._value, self._count, self._children or None, self._parent,
+                self._data, self._term, self._term_data, self._term_at, self._best, self._words)
 
-            # postprocess if exists
-            if post: post(child)
+    def __setstate__(self, state):
+        (self._value, self._count, children, self._parent,
+         self._data, self._term, self._term_data, self._term_at, self._best, self._words) = state
+        self._children = children or _NO_CHILDREN
+        self._tables = None
+        self._owner = None
 
     #--- SPECIAL INFO -------------------------------------------------------
 
     def __len__(self):
         "Number of children"
-        return len(self._children)
+        return len(self._children) + (1 if self._term else 0)
 
     def __contains__(self, char):
         "See if char in children"
@@ -190,9 +435,17 @@ class Triesonode:
         return self.get(char)
 
     def __iter__(self):
-        "Iterator over children"
-        for child in self._children.values():
-            yield child
+        "Iterator over children, the terminator (if any) where it was added"
+        children = self._children.values()
+
+        if not self._term:
+            yield from children
+            return
+
+        children = iter(children)
+        yield from islice(children, self._term_at)
+        yield TriesonodeTerminator(self)
+        yield from children
 
     def __call__(self):
         "call returns value"
@@ -206,7 +459,7 @@ class Triesonode:
 
     def __str__(self):
         "Pretty string format"
-        return f'Triesonode <{self._value}> x {self._count}, {len(self._children)} children: {list(self._children.keys())}'
+        return f'Triesonode <{self._value}> x {self._count}, {len(self)} children: {self.has()}'
 
 ###--- TRIESONODETERMINATOR CLASS -------------------------------------------
 
@@ -214,53 +467,91 @@ class TriesonodeTerminator(Triesonode):
     """
     Represents a terminating node in a trie.
 
-    A terminating node has no children and no value, but can hold data.
+    A terminating node has no children and no value, but can hold data. It is
+    a view onto the terminator fields of its parent node, so its count and
+    data always reflect (and update) the parent.
     """
 
-    def __init__(self, parent: Triesonode = None, data = True):
-        self._value = ''
-        self._count = 1
+    __slots__ = ()
+
+    _value = TERMINATOR
+    _children = _NO_CHILDREN
+
+    def __init__(self, parent: Triesonode):
         self._parent = parent
-        self._data = None
-        self._children = []
 
-        self.data(data)
+    @property
+    def _count(self):
+        return self._parent._term
+
+    @_count.setter
+    def _count(self, count):
+        self._parent._term = count
+        self._parent._tables = None
+
+    @property
+    def _best(self):
+        return self._parent._term
+
+    @property
+    def _words(self):
+        return 1 if self._parent._term else 0
+
+    @property
+    def _data(self):
+        return self._parent._term_data
+
+    @_data.setter
+    def _data(self, data):
+        self._parent._term_data = data
 
-    def add(self):
+    def add(self, *unused, **unused_kwargs):
         pass
 
-    def terminate(self, unused):
+    def terminate(self, unused = None, unused_count = 1):
         pass
 
-    def get(self):
+    def get(self, *unused, **unused_kwargs):
         pass
 
-    def has(self):
+    def has(self, *unused):
         pass
 
     def children(self):
         pass
 
-    def traverse(self, unused_pre, unused_post):
-        yield self
+    def traverse(self, *unused, **unused_kwargs):
+        return iter(())
 
     def is_terminator(self):
         return True
 
+    def has_terminator(self):
+        return False
+
+    def get_terminator(self):
+        return None
+
     def __len__(self):
-        pass
+        return 0
 
     def __contains__(self, unused):
-        pass
+        return False
 
     def __getitem__(self, unused):
         pass
 
     def __iter__(self):
-        pass
+        return iter(())
 
     def __call__(self):
         return None
 
+    def __eq__(self, other):
+        return isinstance(other, TriesonodeTerminator) and other._parent is self._parent
+
+    def __hash__(self):
+        return hash((TriesonodeTerminator, id(self._parent)))
+
     def __str__(self):
         return f'TriesonodeTerminator data: {self._data}'
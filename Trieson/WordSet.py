@@ -0,0 +1,102 @@
+""" WordSet.py
+--------------
+Set of strings shared between versions of a trie
+"""
+
+from collections.abc import Set
+
+class WordSet(Set):
+    """
+    Set of strings made of layers shared with other versions of a trie, plus
+    a set of strings of its own that new strings go into.
+
+    Layers are plain sets that are never changed once they are layers.
+    `fork()` makes the strings of a word set a layer of two new word sets
+    without copying them, so versions share everything they had in common
+    and each holds only the strings added to it since.
+
+    Whenever a new layer is at least half as big as the one below it, the
+    two are merged into one, so layers at least double going down. That
+    keeps their number to about the log of the number of strings, and over
+    the life of a set each string is copied about that many times.
+
+    Supports the `Set` interface plus `add()`, `update()` and `|=`.
+    """
+
+    __slots__ = ('_layers', '_size', '_added')
+
+    def __init__(self, strings = ()):
+        self._layers = ()
+        self._size = 0 # strings in layers
+        self._added = set(strings)
+
+    @classmethod
+    def _over(cls, layers: tuple):
+        "Get an empty word set on top of layers"
+
+        words = cls()
+        words._layers = layers
+        words._size = sum(len(layer) for layer in layers)
+
+        return words
+
+    @classmethod
+    def fork(cls, words) -> tuple:
+        """
+        Get two word sets holding the strings in `words`, a set or WordSet:
+        one to use in its place and one for a new version. The strings of
+        `words` become a shared layer, so `words` must not be changed again.
+        """
+
+        if isinstance(words, WordSet):
+            layers = list(words._layers)
+            words = words._added
+        else:
+            layers = []
+
+        if words:
+            layers.append(words)
+
+            while len(layers) > 1 and 2 * len(layers[-1]) >= len(layers[-2]):
+                top = layers.pop()
+                layers[-1] = layers[-1] | top
+
+        layers = tuple(layers)
+
+        return cls._over(layers), cls._over(layers)
+
+    def add(self, string: str):
+        "Add string to this set only"
+
+        if string in self._added: return
+
+        for layer in self._layers:
+            if string in layer: return
+
+        self._added.add(string)
+
+    def update(self, strings):
+        "Add strings to this set only"
+        for string in strings: self.add(string)
+
+    def __ior__(self, strings):
+        self.update(strings)
+        return self
+
+    def __contains__(self, string):
+        if string in self._added: return True
+
+        for layer in self._layers:
+            if string in layer: return True
+
+        return False
+
+    def __len__(self):
+        return self._size + len(self._added)
+
+    def __iter__(self):
+        for layer in self._layers: yield from layer
+        yield from self._added
+
+    def __repr__(self):
+        return f'WordSet({len(self)} strings, {len(self._layers)} layers)'
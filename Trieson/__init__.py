@@ -1 +1,6 @@
 from .Trieson import Trieson
+from .FrozenTrieson import FrozenTrieson
+from .ParallelGenerator import ParallelGenerator
+from .TriesonLog import TriesonLog
+from .ConcurrentTrieson import ConcurrentTrieson
+from .AsyncTrieson import AsyncTrieson
@@ -0,0 +1,49 @@
+""" bench_make.py
+-----------------
+Word generation throughput: make() in a loop against make_many()
+
+Usage: python benchmarks/bench_make.py [words] [generated]
+"""
+
+import random
+import sys
+import time
+
+from context import Trieson
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+def corpus(n, seed = 1):
+    "Random `^`-prefixed words of 4-12 letters"
+    rng = random.Random(seed)
+    letters = 'abcdefghijklmnopqrstuvwxyz'
+    return ['^' + ''.join(rng.choice(letters) for _ in range(rng.randint(4, 12)))
+            for _ in range(n)]
+
+def rate(fn, n):
+    "Words per second for fn() producing n words"
+    start = time.perf_counter()
+    fn()
+    return n / (time.perf_counter() - start)
+
+def main(words = 5000, generated = 20000):
+    trie = Trieson.Trieson()
+    trie.add(corpus(words))
+
+    # warm up sampling tables so both runs see the same caches
+    trie.make_many(generated, '^')
+
+    print(f'{words} training words, {generated} generated per run')
+    print(f'numpy bulk random: {"yes" if numpy else "no"}')
+
+    for lookahead in (0, 3):
+        single = rate(lambda: [trie.make('^', lookahead = lookahead) for _ in range(generated)], generated)
+        many = rate(lambda: trie.make_many(generated, '^', lookahead = lookahead), generated)
+
+        print(f'lookahead {lookahead}: make {single:,.0f} words/s, make_many {many:,.0f} words/s')
+
+if __name__ == '__main__':
+    main(*(int(arg) for arg in sys.argv[1:3]))
@@ -0,0 +1,39 @@
+""" bench_parallel.py
+---------------------
+Scaling of ParallelGenerator over the number of worker processes
+
+Usage: python benchmarks/bench_parallel.py [words] [generated]
+"""
+
+import os
+import sys
+import time
+
+from context import Trieson
+from bench_make import corpus
+
+def main(words = 20000, generated = 200000):
+    trie = Trieson.Trieson()
+    trie.add(corpus(words))
+
+    start = time.perf_counter()
+    trie.make_many(generated, '^')
+    base = generated / (time.perf_counter() - start)
+
+    print(f'{words} training words, {generated} generated per run')
+    print(f'single process: {base:,.0f} words/s')
+
+    workers = 1
+    while workers <= (os.cpu_count() or 1):
+        with Trieson.ParallelGenerator(trie, workers, chunk_size = 2000) as generator:
+            generator.make(workers) # start workers before timing
+
+            start = time.perf_counter()
+            generator.make(generated, '^')
+            rate = generated / (time.perf_counter() - start)
+
+        print(f'{workers} workers: {rate:,.0f} words/s ({rate / base:.2f}x)')
+        workers *= 2
+
+if __name__ == '__main__':
+    main(*(int(arg) for arg in sys.argv[1:3]))
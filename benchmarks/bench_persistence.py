@@ -0,0 +1,59 @@
+""" bench_persistence.py
+------------------------
+File size and load time of save()/load() against pickle
+
+Usage: python benchmarks/bench_persistence.py [words]
+"""
+
+import os
+import pickle
+import sys
+import tempfile
+import time
+
+from context import Trieson
+from bench_make import corpus
+
+def timed(fn):
+    "Seconds taken by fn() and its result"
+    start = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - start, result
+
+def main(words = 20000):
+    trie = Trieson.Trieson()
+    trie.add(corpus(words))
+
+    print(f'{words} training words, {len(trie.freeze()._labels):,} nodes')
+
+    directory = tempfile.mkdtemp()
+    path = os.path.join(directory, 'trie.trieson')
+    pickled = os.path.join(directory, 'trie.pickle')
+
+    try:
+        seconds, _ = timed(lambda: trie.save(path))
+        print(f'save:        {seconds:8.3f}s  {os.path.getsize(path):>12,} bytes')
+
+        try:
+            with open(pickled, 'wb') as f:
+                seconds, _ = timed(lambda: pickle.dump(trie, f, pickle.HIGHEST_PROTOCOL))
+            print(f'pickle dump: {seconds:8.3f}s  {os.path.getsize(pickled):>12,} bytes')
+        except RecursionError:
+            print('pickle dump: recursion limit exceeded')
+            pickled = None
+
+        for mmap in (True, False):
+            seconds, loaded = timed(lambda: Trieson.Trieson.load(path, mmap))
+            first, _ = timed(lambda: loaded.make('^'))
+            print(f'load (mmap={mmap!s:5}): {seconds:8.4f}s, first make() {first:.4f}s')
+
+        if pickled:
+            with open(pickled, 'rb') as f:
+                seconds, _ = timed(lambda: pickle.load(f))
+            print(f'pickle load:        {seconds:8.4f}s')
+    finally:
+        for name in os.listdir(directory): os.remove(os.path.join(directory, name))
+        os.rmdir(directory)
+
+if __name__ == '__main__':
+    main(*(int(arg) for arg in sys.argv[1:]))
@@ -0,0 +1,10 @@
+# same arrangement as tests/context.py
+
+import os
+import sys
+
+# add Trieson package path to search path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import Trieson
+from Trieson import combos
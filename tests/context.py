@@ -11,3 +11,4 @@ import Trieson
 from Trieson.Triesonode import Triesonode, TriesonodeTerminator, TERMINATOR
 from Trieson import combos
 import Trie
+from Trieson.SuffixIndex import SuffixIndex
@@ -0,0 +1,95 @@
+from context import Trieson
+from context import combos
+
+import asyncio
+import threading
+import time
+import unittest
+
+class TestAsyncTrieson(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.trie = Trieson.Trieson(combos.none)
+        self.trie.add(['apple', 'apiary', 'append', 'baby', 'bonus'])
+        self.words = set(self.trie)
+
+    async def test_make(self):
+        service = Trieson.AsyncTrieson(self.trie)
+        calls = []
+        make_many = self.trie.make_many
+
+        def counted(n, *args, **kwargs):
+            calls.append(n)
+            return make_many(n, *args, **kwargs)
+
+        self.trie.make_many = counted
+
+        with self.subTest("should make a word"):
+            self.assertIn(await service.make(), self.words)
+            self.assertTrue((await service.make('b')).startswith('b'))
+
+        calls.clear()
+
+        with self.subTest("should batch concurrent calls"):
+            words = await asyncio.gather(*(service.make('a', max_len = 6) for _ in range(10)))
+            self.assertEqual(calls, [10])
+            self.assertTrue(all(word in self.words and word.startswith('a') for word in words))
+
+        calls.clear()
+
+        with self.subTest("should batch by parameters"):
+            await asyncio.gather(service.make('a'), service.make('b'), service.make('a'))
+            self.assertEqual(sorted(calls), [1, 2])
+
+        calls.clear()
+
+        with self.subTest("should limit batch size"):
+            service = Trieson.AsyncTrieson(self.trie, batch_size = 4)
+            await asyncio.gather(*(service.make() for _ in range(10)))
+            self.assertEqual(calls, [4, 4, 2])
+
+    async def test_match(self):
+        service = Trieson.AsyncTrieson(self.trie)
+        self.assertEqual(await service.match('ap'), self.trie.match('ap'))
+        self.assertEqual(await service.match('b', 1), self.trie.match('b', 1))
+
+    async def test_limit(self):
+        service = Trieson.AsyncTrieson(self.trie, limit = 2)
+        lock = threading.Lock()
+        running = [0, 0] # current, most
+        match = self.trie.match
+
+        def slow(*args):
+            with lock:
+                running[0] += 1
+                running[1] = max(running)
+            time.sleep(0.01)
+            with lock: running[0] -= 1
+            return match(*args)
+
+        self.trie.match = slow
+
+        await asyncio.gather(*(service.match('a') for _ in range(6)))
+        self.assertEqual(running[1], 2)
+
+    async def test_stream_make(self):
+        service = Trieson.AsyncTrieson(self.trie)
+
+        with self.subTest("should make n words"):
+            words = [word async for word in service.stream_make(25, chunk_size = 10)]
+            self.assertEqual(len(words), 25)
+            self.assertTrue(set(words) <= self.words)
+
+        with self.subTest("should pass parameters"):
+            words = [word async for word in service.stream_make(5, 'b')]
+            self.assertTrue(all(word.startswith('b') for word in words))
+
+        with self.subTest("should stop early"):
+            stream = service.stream_make(100, chunk_size = 10)
+            async for word in stream: break
+            await stream.aclose()
+
+        with self.subTest("should make nothing"):
+            self.assertEqual([word async for word in service.stream_make(0)], [])
+
+if __name__ == '__main__':
+    unittest.main()
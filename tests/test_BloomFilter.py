@@ -0,0 +1,124 @@
+from context import Trieson
+from context import combos
+from Trieson.BloomFilter import BloomFilter, TrieFilter
+
+import os
+import tempfile
+import unittest
+
+class TestBloomFilter(unittest.TestCase):
+    def test_add(self):
+        bloom = BloomFilter(0.01)
+
+        with self.subTest("should report new keys"):
+            self.assertTrue(bloom.add('apple'))
+            self.assertFalse(bloom.add('apple'))
+
+        with self.subTest("should contain added keys"):
+            self.assertIn('apple', bloom)
+            self.assertNotIn('pear', bloom)
+
+        with self.subTest("should reject bad error rates"):
+            with self.assertRaises(ValueError):
+                BloomFilter(0)
+
+    def test_capacity(self):
+        bloom = BloomFilter(0.01, capacity = 1000)
+        keys = [f'key{i}' for i in range(1100)]
+        for key in keys: bloom.add(key)
+
+        with self.subTest("should fill up"):
+            self.assertTrue(bloom.full())
+
+        with self.subTest("should have no false negatives"):
+            self.assertTrue(all(key in bloom for key in keys))
+
+        with self.subTest("should keep false positive rate near target"):
+            false = sum(f'other{i}' in bloom for i in range(10000))
+            self.assertLess(false / 10000, 0.02)
+
+    def test_trie_filter(self):
+        bloom = TrieFilter(0.01, depth = 2)
+        bloom.add_all('apple')
+
+        with self.subTest("should check strings"):
+            self.assertTrue(bloom.may_have('apple'))
+            self.assertFalse(bloom.may_have('app'))
+
+        with self.subTest("should check prefixes by their first characters"):
+            self.assertTrue(bloom.may_have_prefix('a'))
+            self.assertTrue(bloom.may_have_prefix('apricot'))
+            self.assertFalse(bloom.may_have_prefix('b'))
+            self.assertTrue(bloom.may_have_prefix(''))
+
+        with self.subTest("should round trip through bytes"):
+            loaded = TrieFilter.from_buffer(bloom.to_bytes())
+            self.assertEqual(loaded.depth, 2)
+            self.assertTrue(loaded.may_have('apple'))
+            self.assertFalse(loaded.may_have_prefix('b'))
+
+        with self.subTest("should copy"):
+            copy = bloom.copy()
+            copy.add_string('pear')
+            self.assertTrue(copy.may_have('pear'))
+            self.assertFalse(bloom.may_have('pear'))
+
+    def test_trie(self):
+        trie = Trieson.Trieson(combos.none, bloom = 0.01, bloom_depth = 2)
+        trie.add(['apple', 'append', 'banana'])
+
+        with self.subTest("should find strings and prefixes"):
+            self.assertTrue(trie.has('apple'))
+            self.assertTrue(trie.has_prefix('ban'))
+            self.assertFalse(trie.has('app'))
+            self.assertFalse(trie.has_prefix('cherry'))
+            self.assertEqual(trie.match('ap'), ['apple', 'append'])
+
+        with self.subTest("should be kept up to date"):
+            trie['cherry'] = True
+            self.assertTrue(trie.has('cherry'))
+            self.assertTrue(trie.has_prefix('ch'))
+
+        with self.subTest("should be rebuilt when full"):
+            grown = Trieson.Trieson(combos.none, bloom = 0.01)
+            words = [f'word{i}' for i in range(3000)]
+            grown.add(words)
+            self.assertGreater(grown._filter.strings.capacity, 3000)
+            self.assertFalse(grown._filter.full())
+            self.assertTrue(all(grown.has(word) for word in words))
+            self.assertFalse(grown.has('word'))
+
+        with self.subTest("should be built by from_sorted()"):
+            built = Trieson.Trieson.from_sorted(['apple', 'append'], proc = combos.none, bloom = 0.01)
+            self.assertTrue(built.has('append'))
+            self.assertFalse(built.has_prefix('b'))
+            self.assertTrue(built._filter.may_have_prefix('app'))
+
+        with self.subTest("should cover dawg suffixes"):
+            dawg = Trieson.Trieson(dawg = True, bloom = 0.01)
+            dawg.add('abcd')
+            self.assertTrue(dawg.has('cd'))
+            self.assertTrue(dawg.has_prefix('bc'))
+            self.assertFalse(dawg.has_prefix('x'))
+
+        with self.subTest("should be saved and loaded"):
+            fd, path = tempfile.mkstemp(suffix = '.trieson')
+            os.close(fd)
+            self.addCleanup(os.remove, path)
+
+            trie.save(path)
+            loaded = Trieson.Trieson.load(path)
+            self.assertIsNotNone(loaded._filter)
+            self.assertTrue(loaded.has('cherry'))
+            self.assertFalse(loaded.has('cherr'))
+            self.assertFalse(loaded.has_prefix('d'))
+
+            thawed = loaded.thaw()
+            thawed.add('date')
+            self.assertTrue(thawed.has('date'))
+
+        with self.subTest("should be off by default"):
+            self.assertIsNone(Trieson.Trieson()._filter)
+
+if __name__ == '__main__':
+    unittest.main()
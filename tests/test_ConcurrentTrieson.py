@@ -0,0 +1,94 @@
+from context import Trieson
+from context import combos
+
+import threading
+import unittest
+
+class TestConcurrentTrieson(unittest.TestCase):
+    def setUp(self):
+        self.trie = Trieson.ConcurrentTrieson(proc = combos.none, batch = 2)
+        self.trie.add(['apple', 'apiary'])
+
+    def test_existence(self):
+        self.assertIsInstance(self.trie, Trieson.ConcurrentTrieson)
+        self.assertTrue(self.trie.has('apple'))
+        self.assertEqual(self.trie.match('ap'), ['apple', 'apiary'])
+
+    def test_publish(self):
+        with self.subTest("should hold back a partial batch"):
+            self.trie.add('append')
+            self.assertFalse(self.trie.has('append'))
+            self.assertEqual(len(self.trie), 2)
+
+        with self.subTest("should publish a full batch"):
+            self.trie.add('baby')
+            self.assertTrue(self.trie.has('append'))
+            self.assertTrue('baby' in self.trie)
+
+        with self.subTest("should count strings from any iterable"):
+            self.trie.add(word for word in ['cabin', 'cable'])
+            self.assertTrue(self.trie.has('cable'))
+
+        with self.subTest("should publish on request"):
+            self.trie['bonus'] = 'prize'
+            self.trie.publish()
+            self.assertEqual(self.trie['bonus'], 'prize')
+
+    def test_snapshot(self):
+        snapshot = self.trie.snapshot()
+        words = list(snapshot)
+        counts = snapshot._root.get('a')._count
+
+        self.trie.add(['apricot', 'apple', 'banana', 'bandana'])
+
+        with self.subTest("should not change pinned versions"):
+            self.assertEqual(list(snapshot), words)
+            self.assertEqual(snapshot._root.get('a')._count, counts)
+            self.assertEqual(snapshot.count_prefix('ap'), 2)
+
+        with self.subTest("should share unchanged nodes"):
+            current = self.trie.snapshot()
+            self.assertIs(current._root.get('a').get('p').get('i'),
+                          snapshot._root.get('a').get('p').get('i'))
+            self.assertIsNot(current._root.get('a'), snapshot._root.get('a'))
+
+        with self.subTest("should count like a plain trie"):
+            plain = Trieson.Trieson(combos.none)
+            plain.add(['apple', 'apiary', 'apricot', 'apple', 'banana', 'bandana'])
+            self.assertEqual(self.trie.top_k('', 6), plain.top_k('', 6))
+            self.assertEqual(self.trie.count_prefix('ban'), 2)
+
+    def test_readers(self):
+        errors = []
+        done = threading.Event()
+
+        def read():
+            try:
+                while not done.is_set():
+                    self.trie.match('a')
+                    self.trie.make()
+                    self.assertTrue(self.trie.has('apple'))
+            except Exception as e:
+                errors.append(e)
+
+        readers = [threading.Thread(target = read) for _ in range(4)]
+        for reader in readers: reader.start()
+
+        for i in range(2000): self.trie.add(f'a{i:04}')
+        self.trie.publish()
+
+        done.set()
+        for reader in readers: reader.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(len(self.trie), 2002)
+
+    def test_reads_only(self):
+        with self.assertRaises(AttributeError):
+            self.trie.add_counts({ 'apple': 2 })
+
+        with self.assertRaises(TypeError):
+            Trieson.ConcurrentTrieson(dawg = True)
+
+if __name__ == '__main__':
+    unittest.main()
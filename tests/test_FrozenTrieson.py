@@ -0,0 +1,154 @@
+from context import Trieson
+from context import combos
+
+import os
+import random
+import tempfile
+import unittest
+
+class TestFrozenTrieson(unittest.TestCase):
+    def setUp(self):
+        self.words = ['apple', 'apiary', 'append', 'absolute', 'abhor', 'baby', 'app']
+        self.trie = Trieson.Trieson(combos.none)
+        self.trie.add(self.words)
+        self.trie.add('acorn', 'nut')
+        self.frozen = self.trie.freeze()
+
+    def test_existence(self):
+        self.assertIsInstance(self.frozen, Trieson.FrozenTrieson)
+        self.assertEqual(self.frozen.depth(), self.trie.depth())
+        self.assertEqual(len(self.frozen), len(self.trie))
+
+    def test_read_only(self):
+        with self.assertRaises(TypeError):
+            self.frozen.add('zebra')
+
+        with self.assertRaises(TypeError):
+            self.frozen['zebra'] = True
+
+        for name, args in [('add_counts', ({ 'zebra': 2 },)), ('add_stream', (['zebra'],)),
+                           ('add_parallel', (['zebra'],)), ('merge', (self.trie,))]:
+            with self.subTest(f"should not {name}"):
+                with self.assertRaises(TypeError):
+                    getattr(self.frozen, name)(*args)
+
+        self.assertFalse(self.frozen.has('zebra'))
+
+    def test_has(self):
+        for word in self.words:
+            with self.subTest(word = word):
+                self.assertTrue(self.frozen.has(word))
+                self.assertIn(word, self.frozen)
+
+        self.assertFalse(self.frozen.has('ap'))
+        self.assertFalse(self.frozen.has('zebra'))
+
+    def test_has_many(self):
+        batch = ['apple', 'ap', 'zebra', 'acorn', 'app', 'appx']
+        self.assertEqual(self.frozen.has_many(batch), [True, False, False, True, True, False])
+        self.assertEqual(self.frozen.get_many(batch), [True, None, None, 'nut', True, None])
+
+    def test_has_prefix(self):
+        self.assertTrue(self.frozen.has_prefix('app'))
+        self.assertTrue(self.frozen.has_prefix('ba'))
+        self.assertFalse(self.frozen.has_prefix('bond'))
+
+    def test_get(self):
+        self.assertEqual(self.frozen.get('acorn'), 'nut')
+        self.assertEqual(self.frozen.get('apple'), True)
+        self.assertIsNone(self.frozen.get('acor'))
+
+    def test_substrings(self):
+        self.assertCountEqual(self.frozen.substrings('ap'), self.trie.substrings('ap'))
+
+    def test_match(self):
+        with self.subTest("should find the same matches"):
+            self.assertCountEqual(self.frozen.match('a'), self.trie.match('a'))
+
+        with self.subTest("should list matches in the order of the trie"):
+            self.assertEqual(self.frozen.match('app'), ['apple', 'append', 'app'])
+            self.assertEqual(self.frozen.match(''), self.trie.match(''))
+
+        with self.subTest("should respect limit"):
+            self.assertEqual(self.frozen.match('a', 2), self.trie.match('a', 2))
+
+    def test_counts(self):
+        for prefix in ['a', 'ap', 'app', 'b']:
+            with self.subTest(prefix = prefix):
+                frozen = self.frozen._get_node_at_prefix(prefix)
+                node = self.trie._get_node_at_prefix(prefix)
+                self.assertEqual(frozen._count, node._count)
+                self.assertEqual(len(frozen), len(node))
+
+    def test_make(self):
+        for _ in range(10):
+            with self.subTest("should make stored words"):
+                self.assertIn(self.frozen.make(), self.words + ['acorn'])
+
+        self.assertIn(self.frozen.make('ba'), ['baby'])
+        self.assertEqual(self.frozen.make('z'), '')
+
+        with self.subTest("should make what the trie makes for the same seed"):
+            random.seed(5)
+            expected = [self.trie.make() for _ in range(20)]
+            random.seed(5)
+            self.assertEqual([self.frozen.make() for _ in range(20)], expected)
+
+    def test_make_lookahead(self):
+        trie = Trieson.Trieson(combos.none)
+        trie.add(['ble', 'len', 'end'])
+        frozen = trie.freeze()
+
+        self.assertEqual(frozen.make('bl', lookahead = 2), 'blend')
+        self.assertEqual(frozen.make('b', lookahead = 1), 'blend')
+
+    def test_save_load(self):
+        fd, path = tempfile.mkstemp(suffix = '.trieson')
+        os.close(fd)
+        self.addCleanup(os.remove, path)
+
+        self.trie.save(path)
+
+        for mmap in (True, False):
+            with self.subTest("should load what was saved", mmap = mmap):
+                loaded = Trieson.Trieson.load(path, mmap)
+                self.assertIsInstance(loaded, Trieson.FrozenTrieson)
+                self.assertEqual(loaded.dict, self.frozen.dict)
+                self.assertEqual(loaded.depth(), self.trie.depth())
+                self.assertIs(loaded._proc['proc'], combos.none)
+                self.assertEqual(loaded.get('acorn'), 'nut')
+                self.assertEqual(loaded.match('a'), self.trie.match('a'))
+                self.assertEqual(loaded.thaw().match(''), self.trie.match(''))
+
+        with self.subTest("should reject other files"):
+            with open(path, 'wb') as f: f.write(b'not a trie')
+            with self.assertRaises(ValueError):
+                Trieson.Trieson.load(path)
+
+    def test_thaw(self):
+        trie = self.frozen.thaw()
+        self.assertIsInstance(trie, Trieson.Trieson)
+        self.assertNotIsInstance(trie, Trieson.FrozenTrieson)
+
+        with self.subTest("should have the same nodes"):
+            self.assertEqual(trie.dict, self.trie.dict)
+            self.assertEqual(trie.depth(), self.trie.depth())
+            self.assertEqual(trie.get('acorn'), 'nut')
+            for word in self.words:
+                self.assertEqual(trie._get_node_at_prefix(word)._count,
+                                 self.trie._get_node_at_prefix(word)._count)
+
+        with self.subTest("should keep the order of the trie"):
+            self.assertEqual(trie.match(''), self.trie.match(''))
+
+        with self.subTest("should be mutable"):
+            trie.add('zebra')
+            self.assertTrue(trie.has('zebra'))
+            self.assertEqual(trie._get_node_at_prefix('abh').parent()._value, 'b')
+
+    def test_snapshot(self):
+        self.trie.add('zebra')
+        self.assertFalse(self.frozen.has('zebra'))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,35 @@
+from context import Trieson
+from context import combos
+
+import unittest
+
+class TestParallelGenerator(unittest.TestCase):
+    def setUp(self):
+        self.words = ['any', 'and', 'arm', 'are', 'air', 'ago', 'age', 'bon', 'bog']
+        self.trie = Trieson.Trieson(combos.none)
+        self.trie.add(self.words)
+
+    def test_make(self):
+        with Trieson.ParallelGenerator(self.trie, 2, seed = 1, chunk_size = 7) as generator:
+            made = generator.make(30)
+
+            with self.subTest("should make n stored words"):
+                self.assertEqual(len(made), 30)
+                for word in made:
+                    self.assertIn(word, self.words)
+
+            with self.subTest("should pass on parameters"):
+                self.assertEqual(generator.make(4, 'ai'), ['air'] * 4)
+                self.assertEqual(generator.make(3, 'b', end_char = 'o'), ['bo'] * 3)
+
+    def test_reproducible(self):
+        with Trieson.ParallelGenerator(self.trie, 2, seed = 'abc', chunk_size = 5) as generator:
+            first = [generator.make(20), generator.make(20)]
+
+        with Trieson.ParallelGenerator(self.trie, 3, seed = 'abc', chunk_size = 5) as generator:
+            second = [generator.make(20), generator.make(20)]
+
+        self.assertEqual(first, second)
+
+if __name__ == '__main__':
+    unittest.main()
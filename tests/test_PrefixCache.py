@@ -0,0 +1,91 @@
+from context import Trieson
+from context import combos
+from Trieson.PrefixCache import PrefixCache
+
+import unittest
+
+class TestPrefixCache(unittest.TestCase):
+    def setUp(self):
+        self.cache = PrefixCache(2)
+        self.found = []
+
+    def find(self, prefix):
+        self.found.append(prefix)
+        return None if prefix.startswith('z') else prefix.upper()
+
+    def test_lookup(self):
+        self.assertEqual(self.cache.lookup('a', self.find), 'A')
+        self.assertEqual(self.cache.lookup('a', self.find), 'A')
+        self.assertEqual(self.found, ['a'])
+        self.assertEqual(self.cache.info(), (1, 1, 2, 1))
+
+    def test_evicts_least_recently_used(self):
+        for prefix in ['a', 'b', 'a', 'c', 'a', 'b']:
+            self.cache.lookup(prefix, self.find)
+
+        self.assertEqual(self.found, ['a', 'b', 'c', 'b'])
+        self.assertEqual(len(self.cache), 2)
+
+    def test_invalidate(self):
+        self.cache.lookup('a', self.find)
+        self.cache.lookup('z', self.find)
+        self.cache.invalidate()
+
+        with self.subTest("should keep found prefixes"):
+            self.cache.lookup('a', self.find)
+            self.assertEqual(self.found, ['a', 'z'])
+
+        with self.subTest("should forget missing prefixes"):
+            self.cache.lookup('z', self.find)
+            self.assertEqual(self.found, ['a', 'z', 'z'])
+
+        with self.subTest("should forget everything if asked"):
+            self.cache.invalidate(found = True)
+            self.cache.lookup('a', self.find)
+            self.assertEqual(self.found, ['a', 'z', 'z', 'a'])
+
+    def test_trie(self):
+        trie = Trieson.Trieson(combos.none, cache_size = 8)
+        trie.add(['apple', 'append'])
+
+        with self.subTest("should cache lookups"):
+            self.assertTrue(trie.has_prefix('app'))
+            self.assertTrue(trie.has_prefix('app'))
+            self.assertEqual(trie.cache_info().hits, 1)
+
+        with self.subTest("should see strings added after a miss"):
+            self.assertFalse(trie.has('baby'))
+            trie.add('baby')
+            self.assertTrue(trie.has('baby'))
+            self.assertEqual(trie.match('ba'), ['baby'])
+
+        with self.subTest("should leave cache out of has()"):
+            trie.cache_clear()
+            trie.has('apple')
+            trie.has('zebra')
+            self.assertEqual(trie.cache_info(), (0, 0, 8, 0))
+
+        with self.subTest("should see strings added before a failed add"):
+            trie.has_prefix('bo')
+            with self.assertRaises(TypeError):
+                trie.add(['bob', None])
+            self.assertTrue(trie.has('bob'))
+            self.assertTrue(trie.has_prefix('bo'))
+
+        with self.subTest("should forget stale dawg nodes"):
+            dawg = Trieson.Trieson(dawg = True, cache_size = 8)
+            dawg.add('abc')
+            self.assertEqual(dawg.count_prefix('b'), 1)
+            dawg.add('xbd')
+            self.assertEqual(dawg.count_prefix('b'), 2)
+
+        with self.subTest("should carry cache size to snapshots"):
+            frozen = trie.freeze()
+            frozen.has_prefix('ap')
+            self.assertEqual(frozen.cache_info(), (0, 1, 8, 1))
+
+        with self.subTest("should report no cache"):
+            self.assertEqual(Trieson.Trieson().cache_info(), (0, 0, 0, 0))
+
+if __name__ == '__main__':
+    unittest.main()
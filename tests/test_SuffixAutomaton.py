@@ -0,0 +1,165 @@
+from context import Trieson
+from context import combos
+
+import os
+import random
+import shutil
+import tempfile
+import unittest
+
+def dump(trie):
+    "Map every string in trie to its count, and every ending to (count, data)"
+    out = {}
+
+    def collect(node, string):
+        for child in node:
+            if child.is_terminator():
+                out[string + '$'] = (child._count, child.data())
+            else:
+                out[string + child._value] = child._count
+                collect(child, string + child._value)
+
+    collect(trie._root, '')
+    return out
+
+class TestSuffixAutomaton(unittest.TestCase):
+    def setUp(self):
+        self.words = ['apple', 'angel', 'bagel', 'apply', 'bag']
+        self.trie = Trieson.Trieson(dawg = True)
+        self.trie.add(self.words)
+
+    def test_needs_seq_to_end(self):
+        with self.assertRaises(ValueError):
+            Trieson.Trieson(combos.none, dawg = True)
+
+        with self.assertRaises(ValueError):
+            self.trie.add('word', proc = combos.none)
+
+    def test_same_as_trie(self):
+        for seed in range(30):
+            rng = random.Random(seed)
+            min = rng.choice([1, 2, 3])
+            words = [''.join(rng.choice('abc') for _ in range(rng.randint(1, 7)))
+                     for _ in range(rng.randint(1, 12))]
+
+            trie = Trieson.Trieson(proc_kwargs = {'min': min})
+            dawg = Trieson.Trieson(proc_kwargs = {'min': min}, dawg = True)
+            for i, word in enumerate(words):
+                data = rng.choice([True, None, 'x', 'y'])
+                count = rng.randint(1, 3)
+                trie.add(word, data, count = count)
+                dawg.add(word, data, count = count)
+
+                # counts are kept up to date by every add
+                with self.subTest(seed = seed, min = min, words = words[:i + 1]):
+                    self.assertEqual(dump(trie), dump(dawg))
+                    self.assertEqual(trie.depth(), dawg.depth())
+
+    def test_add_count(self):
+        for seed in range(10):
+            rng = random.Random(seed)
+            counts = {''.join(rng.choice('abc') for _ in range(rng.randint(1, 6))): rng.randint(1, 4)
+                      for _ in range(rng.randint(1, 8))}
+
+            trie = Trieson.Trieson()
+            dawg = Trieson.Trieson(dawg = True)
+            trie.add_counts(counts)
+            dawg.add_counts(counts)
+
+            with self.subTest(seed = seed, counts = counts):
+                self.assertEqual(dump(trie), dump(dawg))
+
+    def test_count_prefix(self):
+        trie = Trieson.Trieson()
+        trie.add(self.words)
+
+        for prefix in ['', 'a', 'ag', 'gel', 'pp', 'z']:
+            with self.subTest(prefix = prefix):
+                self.assertEqual(self.trie.count_prefix(prefix), trie.count_prefix(prefix))
+
+    def test_count_prefix_as_added(self):
+        for seed in range(20):
+            rng = random.Random(seed)
+            min = rng.choice([1, 2, 3])
+
+            trie = Trieson.Trieson(proc_kwargs = {'min': min})
+            dawg = Trieson.Trieson(proc_kwargs = {'min': min}, dawg = True)
+
+            for _ in range(rng.randint(1, 10)):
+                word = ''.join(rng.choice('abc') for _ in range(rng.randint(1, 7)))
+                trie.add(word)
+                dawg.add(word)
+
+                prefixes = [string[:-1] for string in dump(trie)]
+
+                with self.subTest(seed = seed, min = min, word = word):
+                    self.assertEqual([dawg.count_prefix(prefix) for prefix in prefixes],
+                                     [trie.count_prefix(prefix) for prefix in prefixes])
+
+    def test_save(self):
+        path = os.path.join(tempfile.mkdtemp(), 'dawg.trieson')
+        self.addCleanup(shutil.rmtree, os.path.dirname(path))
+
+        self.trie.save(path)
+        loaded = Trieson.Trieson.load(path)
+        thawed = loaded.thaw()
+
+        with self.subTest("should store the automaton rather than the trie it stands for"):
+            self.assertIsNotNone(loaded._automaton)
+            self.assertEqual(len(loaded._labels), 0)
+            self.assertEqual(dump(loaded), dump(self.trie))
+            self.assertEqual(loaded.match('a'), self.trie.match('a'))
+            self.assertEqual(loaded.has_many(['apple', 'pple', 'appl']), [True, True, False])
+            self.assertEqual(loaded.count_prefix('ag'), self.trie.count_prefix('ag'))
+
+        with self.subTest("should make what the dawg trie makes for the same seed"):
+            random.seed(5)
+            expected = [self.trie.make(lookahead = 2) for _ in range(20)]
+            random.seed(5)
+            self.assertEqual([loaded.make(lookahead = 2) for _ in range(20)], expected)
+
+        with self.subTest("should thaw into a dawg trie"):
+            self.assertIsNotNone(thawed._automaton)
+            self.assertEqual(dump(thawed), dump(self.trie))
+            self.assertEqual(thawed.dict, self.trie.dict)
+
+        with self.subTest("should carry on adding"):
+            thawed.add('maple')
+            self.trie.add('maple')
+            self.assertEqual(dump(thawed), dump(self.trie))
+            self.assertEqual(thawed.count_prefix('pl'), self.trie.count_prefix('pl'))
+
+    def test_has(self):
+        for word in self.words:
+            with self.subTest(word = word):
+                self.assertTrue(self.trie.has(word))
+                self.assertTrue(self.trie.has(word[1:]))
+
+        self.assertFalse(self.trie.has('appl'))
+        self.assertFalse(self.trie.has('e'))
+
+    def test_has_prefix(self):
+        self.assertTrue(self.trie.has_prefix('ppl'))
+        self.assertTrue(self.trie.has_prefix('gel'))
+        self.assertFalse(self.trie.has_prefix('ga'))
+
+    def test_match(self):
+        self.assertCountEqual(self.trie.match('ag'), ['ag', 'agel'])
+        self.assertCountEqual(self.trie.match('appl'), ['apple', 'apply'])
+
+    def test_make(self):
+        trie = Trieson.Trieson()
+        trie.add(self.words)
+        possible = trie.match('')
+
+        for _ in range(20):
+            with self.subTest("should make strings the trie could make"):
+                self.assertIn(self.trie.make(), possible)
+
+        self.assertIn(self.trie.make('ang', lookahead = 2), trie.match('ang'))
+
+    def test_len(self):
+        self.assertEqual(len(self.trie), len(self.words))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,65 @@
+from context import Trieson
+from context import combos
+from context import SuffixIndex
+
+import unittest
+
+class TestSuffixIndex(unittest.TestCase):
+    def setUp(self):
+        self.trie = Trieson.Trieson(combos.none)
+        self.trie.add(['blend', 'lend', 'end', 'nd'])
+        self.index = SuffixIndex(self.trie._root)
+
+    def test_walk(self):
+        self.assertIs(self.index.walk('ble'), self.trie._get_node_at_prefix('ble'))
+        self.assertIs(self.index.walk(''), self.trie._root)
+        self.assertIsNone(self.index.walk('blx'))
+
+    def test_link(self):
+        node = self.index.walk('blen')
+
+        for suffix in ['len', 'en', 'n', '']:
+            with self.subTest(suffix = suffix):
+                node = self.index.link(node)
+                self.assertIs(node, self.trie._get_node_at_prefix(suffix))
+
+        with self.subTest("root should have no link"):
+            self.assertIsNone(self.index.link(self.trie._root))
+
+    def test_link_missing(self):
+        trie = Trieson.Trieson(combos.none)
+        trie.add(['abc'])
+        index = SuffixIndex(trie._root)
+        node = index.walk('abc')
+
+        self.assertIsNone(index.link(node))
+
+        with self.subTest("should find link added after invalidation"):
+            trie.add(['bc'])
+            self.assertIsNone(index.link(node))
+            index.invalidate()
+            self.assertIs(index.link(node), trie._get_node_at_prefix('bc'))
+
+    def test_slide(self):
+        node = self.index.walk('bl')
+
+        with self.subTest("should slide window along"):
+            node = self.index.slide(node, 2, 'e', 2)
+            self.assertIs(node, self.trie._get_node_at_prefix('le'))
+
+        with self.subTest("should grow window while shorter than size"):
+            node = self.index.slide(node, 2, 'n', 4)
+            self.assertIs(node, self.trie._get_node_at_prefix('len'))
+
+        with self.subTest("should return None for missing window"):
+            self.assertIsNone(self.index.slide(node, 3, 'x', 3))
+
+    def test_make_builds_index(self):
+        self.assertIsNone(self.trie._suffixes)
+        self.trie.make(lookahead = 0)
+        self.assertIsNone(self.trie._suffixes)
+        self.trie.make('bl', lookahead = 2)
+        self.assertIsInstance(self.trie._suffixes, SuffixIndex)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -3,6 +3,9 @@ from context import Triesonode
 from context import combos
 
 import os
+import pickle
+import random
+import tempfile
 import unittest
 
 import logging
@@ -68,6 +71,36 @@ class TestTrie(unittest.TestCase):
 
         self.assertFalse(self.trie.has('amble'))
 
+    def test_has_many(self):
+        self.trie.add(['apple', 'apiary', 'append', 'baby'])
+        self.trie.add('acorn', 'nut')
+        batch = ['baby', 'app', 'apple', 'zebra', 'acorn', 'apple', 'appended', '']
+
+        with self.subTest("should give has() for each string, in order"):
+            self.assertEqual(self.trie.has_many(batch), [self.trie.has(s) for s in batch])
+
+        with self.subTest("should give data for each string, in order"):
+            self.assertEqual(self.trie.get_many(iter(batch)),
+                             [True, None, True, None, 'nut', True, None, None])
+
+        with self.subTest("should stream in chunks"):
+            self.assertEqual(list(self.trie.has_stream(batch, chunk_size = 3)),
+                             list(zip(batch, self.trie.has_many(batch))))
+            self.assertEqual(dict(self.trie.get_stream(iter(batch), chunk_size = 2))['acorn'], 'nut')
+
+        with self.subTest("should stream lines of a file"):
+            fd, path = tempfile.mkstemp(suffix = '.txt')
+            with os.fdopen(fd, 'w') as f:
+                f.write('\n'.join(['baby', 'bab', 'apiary']))
+            self.addCleanup(os.remove, path)
+            self.assertEqual(list(self.trie.has_stream(path)),
+                             [('baby', True), ('bab', False), ('apiary', True)])
+
+        with self.subTest("should work on a dawg"):
+            dawg = Trieson.Trieson(dawg = True)
+            dawg.add(['apple', 'maple'])
+            self.assertEqual(dawg.has_many(['ple', 'pl', 'apple', 'le']), [True, False, True, True])
+
     def test_get(self):
         ss = {
             'apple': 'fruit',
@@ -121,6 +154,140 @@ class TestTrie(unittest.TestCase):
             with self.subTest(match = match):
                 self.assertIn(match, [w for w in words if w.startswith('a')])
 
+        with self.subTest("should list strings in the order they were added"):
+            trie = Trieson.Trieson(combos.none)
+            trie.add(['ab', 'a', 'abc'])
+            self.assertEqual(trie.match('a'), ['ab', 'abc', 'a'])
+            self.assertEqual(trie.match('a', 1), ['ab'])
+
+    def test_iter_matches(self):
+        words = ['apple', 'apiary', 'append', 'app', 'absolute', 'abhor', 'baby']
+        self.trie.add(words)
+
+        with self.subTest("should be lazy"):
+            matches = self.trie.iter_matches('ap')
+            self.assertNotIsInstance(matches, list)
+            self.assertEqual(next(matches), 'apple')
+
+        with self.subTest("should yield the same as match"):
+            self.assertEqual(list(self.trie.iter_matches('a')), self.trie.match('a'))
+
+        with self.subTest("should yield nothing for missing prefix"):
+            self.assertEqual(list(self.trie.iter_matches('z')), [])
+
+    def test_match_page(self):
+        words = ['apple', 'apiary', 'append', 'app', 'absolute', 'abhor', 'baby']
+        self.trie.add(words)
+        expected = self.trie.match('a')
+
+        for limit in range(1, 8):
+            with self.subTest("pages should add up to all matches", limit = limit):
+                pages, cursor = [], None
+                while True:
+                    page, cursor = self.trie.match_page('a', limit, cursor)
+                    pages.extend(page)
+                    self.assertLessEqual(len(page), limit)
+                    if cursor is None: break
+                self.assertEqual(pages, expected)
+
+        with self.subTest("should resume after cursor without rescanning"):
+            visited = []
+            node = self.trie._get_node_at_prefix('a')
+            for _ in node.traverse(visited.append, after = ['b', 's', 'o', 'l', 'u', 't', 'e', '']): pass
+            self.assertEqual([n._value for n in visited[8:]], ['h', 'o', 'r', ''])
+
+        with self.subTest("should resume in frozen tries"):
+            frozen = self.trie.freeze()
+            page, cursor = frozen.match_page('ap', 2)
+            self.assertEqual(page, ['apple', 'append'])
+            self.assertEqual(frozen.match_page('ap', 5, cursor), (['app', 'apiary'], None))
+
+        with self.subTest("should reject bad cursors"):
+            with self.assertRaises(ValueError):
+                self.trie.match_page('a', 2, 'bab')
+            with self.assertRaises(ValueError):
+                self.trie.match_page('a', 2, 'azzz')
+
+    def test_top_k(self):
+        counts = {'apple': 5, 'apiary': 1, 'append': 3, 'app': 4, 'abhor': 7, 'baby': 2}
+        self.trie.add_counts(counts)
+
+        with self.subTest("should return most frequent first"):
+            self.assertEqual(self.trie.top_k('a', 3), ['abhor', 'apple', 'app'])
+            self.assertEqual(self.trie.top_k('ap', 10), ['apple', 'app', 'append', 'apiary'])
+
+        with self.subTest("should follow later adds"):
+            self.trie.add('apiary', count = 6)
+            self.assertEqual(self.trie.top_k('ap', 1), ['apiary'])
+
+        with self.subTest("should handle missing prefix and k of 0"):
+            self.assertEqual(self.trie.top_k('z'), [])
+            self.assertEqual(self.trie.top_k('a', 0), [])
+
+        with self.subTest("should work on built, frozen and thawed tries"):
+            built = Trieson.Trieson.from_sorted(sorted(w for w, n in counts.items() for _ in range(n)),
+                                                proc = combos.none)
+            self.assertEqual(built.top_k('a', 3), ['abhor', 'apple', 'app'])
+            frozen = built.freeze()
+            self.assertEqual(frozen.top_k('ap', 2), ['apple', 'app'])
+            self.assertEqual(frozen.thaw().top_k('', 2), ['abhor', 'apple'])
+
+    def test_count_prefix(self):
+        words = ['apple', 'apiary', 'append', 'app', 'abhor', 'baby']
+        self.trie.add(words)
+        self.trie.add('apple', count = 3)
+
+        for prefix in ['', 'a', 'ap', 'app', 'apple', 'b', 'z']:
+            with self.subTest(prefix = prefix):
+                expected = len([w for w in words if w.startswith(prefix)])
+                self.assertEqual(self.trie.count_prefix(prefix), expected)
+                self.assertEqual(self.trie.freeze().count_prefix(prefix), expected)
+
+    def test_sample_existing(self):
+        counts = {'apple': 50, 'apiary': 1, 'append': 1, 'app': 1, 'baby': 1}
+        self.trie.add_counts(counts)
+
+        with self.subTest("should return n stored words"):
+            samples = self.trie.sample_existing('ap', 40)
+            self.assertEqual(len(samples), 40)
+            for word in samples:
+                self.assertIn(word, ['apple', 'apiary', 'append', 'app'])
+
+        with self.subTest("should pick uniformly"):
+            random.seed(5)
+            samples = self.trie.sample_existing('ap', 400)
+            self.assertLess(samples.count('apple'), 200)
+
+        with self.subTest("should pick by frequency"):
+            random.seed(5)
+            samples = self.trie.sample_existing('ap', 400, by_frequency = True)
+            self.assertGreater(samples.count('apple'), 300)
+
+        with self.subTest("should return nothing for missing prefix"):
+            self.assertEqual(self.trie.sample_existing('z', 3), [])
+
+    def test_rank_select(self):
+        words = ['apple', 'apiary', 'append', 'app', 'abhor', 'baby', 'ba']
+        self.trie.add(words)
+        self.trie.add('apple', count = 3)
+        ordered = sorted(words)
+
+        for trie in (self.trie, self.trie.freeze()):
+            for i, word in enumerate(ordered):
+                with self.subTest(trie = type(trie).__name__, word = word):
+                    self.assertEqual(trie.index_of(word), i)
+                    self.assertEqual(trie.word_at(i), word)
+
+        with self.subTest("should count negative ranks from the end"):
+            self.assertEqual(self.trie.word_at(-1), 'baby')
+
+        with self.subTest("should reject missing words and ranks"):
+            for word in ['ap', 'apples', 'zebra']:
+                with self.assertRaises(ValueError):
+                    self.trie.index_of(word)
+            with self.assertRaises(IndexError):
+                self.trie.word_at(len(words))
+
     def test_make(self):
         words = ['any', 'and', 'arm', 'are', 'air', 'ago', 'age', 'bon', 'bog']
 
@@ -210,6 +377,242 @@ class TestTrie(unittest.TestCase):
         with self.subTest("Should return bandag with end_char g"):
             self.assertEqual(self.trie.make(end_char='g'), 'bandag')
 
+    def test_make_many(self):
+        words = ['any', 'and', 'arm', 'are', 'air', 'ago', 'age', 'bon', 'bog']
+        self.trie.add(words)
+
+        with self.subTest("should return list of n words"):
+            made = self.trie.make_many(20)
+            self.assertIsInstance(made, list)
+            self.assertEqual(len(made), 20)
+            for word in made:
+                self.assertIn(word, words)
+
+        with self.subTest("should respect prefix"):
+            for word in self.trie.make_many(10, 'b'):
+                self.assertIn(word, ['bon', 'bog'])
+
+        with self.subTest("should return generator if lazy"):
+            made = self.trie.make_many(5, 'ai', lazy = True)
+            self.assertNotIsInstance(made, list)
+            self.assertEqual(list(made), ['air'] * 5)
+
+        with self.subTest("should pass on keyword parameters"):
+            self.assertEqual(self.trie.make_many(3, 'b', end_char = 'o'), ['bo'] * 3)
+            self.assertEqual(self.trie.make_many(3, 'ai', max_len = 2, fail_str = '#'), ['#air'] * 3)
+
+        with self.subTest("should return empty strings for missing prefix"):
+            self.assertEqual(self.trie.make_many(3, 'z'), ['', '', ''])
+
+    def test_add_stream(self):
+        words = ['apple', 'apiary', 'append', 'baby', 'bonus', 'colab']
+
+        with self.subTest("should add words from an iterable"):
+            self.trie.add_stream(iter(words))
+            for word in words:
+                self.assertTrue(self.trie.has(word))
+
+        with self.subTest("should build the same trie as add"):
+            trie = Trieson.Trieson(combos.seq_all)
+            trie.add(words)
+            streamed = Trieson.Trieson(combos.seq_all)
+            streamed.add_stream(word for word in words)
+            self.assertEqual(list(streamed), list(trie))
+            self.assertEqual(streamed.depth(), trie.depth())
+
+        fd, path = tempfile.mkstemp(suffix = '.txt')
+        with os.fdopen(fd, 'w') as f:
+            f.write('\n'.join(words + ['']))
+        self.addCleanup(os.remove, path)
+
+        for use_mmap in (False, True):
+            with self.subTest("should read lines of a file", mmap = use_mmap):
+                trie = Trieson.Trieson(combos.none)
+                trie.add_stream(path, mmap = use_mmap)
+                self.assertEqual(trie.dict, set(words))
+
+        with self.subTest("should report progress"):
+            reports = []
+            trie = Trieson.Trieson(combos.none)
+            trie.add_stream(words, chunk_size = 4, progress = reports.append)
+            self.assertEqual([report.words for report in reports], [4, 6])
+            self.assertEqual(reports[-1].nodes, 25)
+
+    def test_add_count(self):
+        counts = {'any': 3, 'and': 1, 'arm': 5, 'bog': 2}
+
+        repeated = Trieson.Trieson(combos.seq_all)
+        for word, count in counts.items():
+            for _ in range(count): repeated.add(word)
+
+        with self.subTest("should match repeated insertion"):
+            trie = Trieson.Trieson(combos.seq_all)
+            for word, count in counts.items():
+                trie.add(word, count = count)
+
+            self.assertEqual(list(trie), list(repeated))
+            for node, other in zip(trie._root.traverse(), repeated._root.traverse()):
+                self.assertEqual((node._value, node._count), (other._value, other._count))
+
+        with self.subTest("should make the same words as repeated insertion"):
+            random.seed(3)
+            made = [trie.make() for _ in range(50)]
+            random.seed(3)
+            self.assertEqual(made, [repeated.make() for _ in range(50)])
+
+        for pairs in (counts, list(counts.items())):
+            with self.subTest("add_counts should take mapping or pairs", pairs = type(pairs)):
+                trie = Trieson.Trieson(combos.seq_all)
+                trie.add_counts(pairs)
+                for node, other in zip(trie._root.traverse(), repeated._root.traverse()):
+                    self.assertEqual((node._value, node._count), (other._value, other._count))
+
+        with self.subTest("should reject counts below 1"):
+            with self.assertRaises(ValueError):
+                self.trie.add('any', count = 0)
+
+    def test_from_sorted(self):
+        words = sorted(['apple', 'apiary', 'append', 'app', 'app', 'baby', 'bonus', 'colab'])
+
+        for proc in (combos.none, combos.seq_to_end, combos.seq_all):
+            with self.subTest("should build the same trie as add", proc = proc.__name__):
+                trie = Trieson.Trieson(proc)
+                for word in words: trie.add(word)
+
+                built = Trieson.Trieson.from_sorted(words, proc = proc)
+                self.assertEqual(built.dict, trie.dict)
+                self.assertEqual(built.depth(), trie.depth())
+                for node, other in zip(built._root.traverse(), trie._root.traverse()):
+                    self.assertEqual((node._value, node._count), (other._value, other._count))
+
+        with self.subTest("should not depend on order"):
+            trie = Trieson.Trieson(combos.none)
+            trie.add(words[::-1])
+            built = Trieson.Trieson.from_sorted(words[::-1], proc = combos.none)
+            for node, other in zip(built._root.traverse(), trie._root.traverse()):
+                self.assertEqual((node._value, node._count), (other._value, other._count))
+
+        with self.subTest("should keep terminator data"):
+            built = Trieson.Trieson.from_sorted(words, 'x', combos.none)
+            self.assertEqual(built.get('apple'), 'x')
+
+        with self.subTest("should freeze if asked"):
+            built = Trieson.Trieson.from_sorted(iter(words), proc = combos.none, frozen = True)
+            self.assertIsInstance(built, Trieson.FrozenTrieson)
+            self.assertTrue(built.has('apiary'))
+
+    def test_clone(self):
+        self.trie.add(['apple', 'apiary', 'baby'])
+        self.trie.add('acorn', 'nut')
+        clone = self.trie.clone()
+
+        with self.subTest("should start out the same"):
+            self.assertEqual(list(clone), list(self.trie))
+            self.assertIs(clone._root, self.trie._root)
+
+        clone.add(['append', 'apple'])
+        self.trie.add('bonus')
+
+        with self.subTest("should keep adds apart"):
+            self.assertEqual(clone.dict, {'apple', 'apiary', 'baby', 'acorn', 'append'})
+            self.assertEqual(self.trie.dict, {'apple', 'apiary', 'baby', 'acorn', 'bonus'})
+            self.assertFalse(self.trie.has('append'))
+            self.assertFalse(clone.has('bonus'))
+            self.assertEqual(self.trie.top_k('ap', 1), ['apple'])
+            self.assertEqual(self.trie.get_many(['apple', 'acorn']), [True, 'nut'])
+            self.assertEqual(clone._root.get('a').get('p')._count, 4)
+            self.assertEqual(self.trie._root.get('a').get('p')._count, 2)
+
+        with self.subTest("should only copy changed paths"):
+            self.assertIs(clone._root.get('a').get('c'), self.trie._root.get('a').get('c'))
+            self.assertIsNot(clone._root.get('a'), self.trie._root.get('a'))
+
+        with self.subTest("should count like a plain trie"):
+            plain = Trieson.Trieson(combos.none)
+            plain.add(['apple', 'apiary', 'baby', 'acorn', 'append', 'apple'])
+            self.assertEqual(clone.top_k('', 5), plain.top_k('', 5))
+            self.assertEqual(clone.index_of('baby'), plain.index_of('baby'))
+
+        with self.subTest("should drop the suffix index after copying nodes"):
+            clone.make('ap', lookahead = 2)
+            clone.add('apex')
+            self.assertIsNotNone(clone._suffixes)
+            clone.add('bonbon')
+            self.assertIsNone(clone._suffixes)
+
+        with self.subTest("should own its nodes after pickling"):
+            pickled = pickle.loads(pickle.dumps(clone))
+            root = pickled._root
+            pickled.make('ap', lookahead = 2)
+            pickled.add(['avid', 'bonnet'])
+            self.assertIs(pickled._root, root)
+            self.assertIsNotNone(pickled._suffixes)
+            self.assertEqual(pickled.dict, clone.dict | {'avid', 'bonnet'})
+
+        with self.subTest("should refuse dawg tries"):
+            with self.assertRaises(TypeError):
+                Trieson.Trieson(dawg = True).clone()
+
+    def dump(self, trie):
+        "Everything about a trie's nodes, children in order"
+        def node(n):
+            return (n._value, n._count, n._term, n._term_data, n._best, n._words,
+                    [node(child) for child in n._children.values()])
+        return node(trie._root), trie.dict, trie.depth()
+
+    def test_merge(self):
+        first = ['apple', 'apiary', 'baby', 'apple']
+        second = ['bonus', 'apple', 'append', 'baby', 'zebra']
+
+        self.trie.add(first)
+        self.trie.add('acorn', 'nut')
+        other = Trieson.Trieson(combos.none)
+        other.add(second)
+        other.add('acorn', 'seed')
+
+        sequential = Trieson.Trieson(combos.none)
+        sequential.add(first)
+        sequential.add('acorn', 'nut')
+        sequential.add(second)
+        sequential.add('acorn', 'seed')
+
+        with self.subTest("should match sequential insertion"):
+            self.trie.merge(other)
+            self.assertEqual(self.dump(self.trie), self.dump(sequential))
+            self.assertEqual(self.trie.match(''), sequential.match(''))
+
+        with self.subTest("should leave other alone"):
+            self.assertEqual(other.count_prefix(), 6)
+            self.trie.add('bonuses')
+            self.assertFalse(other.has_prefix('bonuses'))
+
+        with self.subTest("should reduce data"):
+            a = Trieson.Trieson(combos.none).add('x', 1)
+            b = Trieson.Trieson(combos.none).add('x', 2)
+            a.merge(b, lambda mine, theirs: mine + theirs)
+            self.assertEqual(a.get('x'), 3)
+
+        with self.subTest("should merge a frozen trie"):
+            merged = Trieson.Trieson(combos.none).merge(other.freeze())
+            self.assertEqual(sorted(merged), sorted(other))
+            self.assertEqual(merged.count_prefix('a'), other.count_prefix('a'))
+
+        with self.subTest("should refuse dawg tries"):
+            with self.assertRaises(TypeError):
+                self.trie.merge(Trieson.Trieson(dawg = True))
+
+    def test_add_parallel(self):
+        random.seed(3)
+        words = [''.join(random.choices('abcde', k = random.randint(1, 6))) for _ in range(500)]
+
+        sequential = Trieson.Trieson()
+        sequential.add(words)
+
+        parallel = Trieson.Trieson()
+        parallel.add_parallel(words, workers = 2, chunk_size = 60)
+
+        self.assertEqual(self.dump(parallel), self.dump(sequential))
+
     def test_depth(self):
         self.trie.add('abba')
         self.assertEqual(self.trie.depth(), 4)
@@ -0,0 +1,226 @@
+from context import Trieson
+from context import combos
+from Trieson.TriesonLog import read_log
+
+import os
+import pickle
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+
+def dump(trie):
+    "Map every string in trie to its count, and every ending to (count, data)"
+    out = {}
+
+    def collect(node, string):
+        for child in node:
+            if child.is_terminator():
+                out[string + '$'] = (child._count, child.data())
+            else:
+                out[string + child._value] = child._count
+                collect(child, string + child._value)
+
+    collect(trie._root, '')
+    return out
+
+class TestTriesonLog(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dir)
+
+        self.log = os.path.join(self.dir, 'trie.log')
+        self.snapshot = os.path.join(self.dir, 'trie.trieson')
+
+        self.words = ['apple', 'apiary', 'append', 'baby', 'bonus']
+        self.trie = Trieson.Trieson(combos.none)
+        self.trie.attach_log(self.log, batch = 2)
+
+    def tearDown(self):
+        self.trie._log.close()
+
+    def assertSameTrie(self, trie, other):
+        "Compare counts and data of every node, ignoring child order"
+        self.assertEqual(trie.dict, other.dict)
+        self.assertEqual(trie.depth(), other.depth())
+        self.assertEqual(dump(trie), dump(other))
+
+    def test_read_log(self):
+        self.trie.add(self.words)
+        self.trie.add('apple', 'x', count = 3)
+        self.trie.add('abc', proc = combos.seq_all)
+        self.trie._log.sync()
+
+        generation, records = read_log(self.log)
+
+        self.assertEqual(generation, 1)
+        self.assertEqual(records[:len(self.words)], [(word, True, 1, None) for word in self.words])
+        self.assertEqual(records[-2], ('apple', 'x', 3, None))
+        self.assertEqual(records[-1], ('abc', True, 1, (combos.seq_all, [], {})))
+
+    def test_pickle(self):
+        self.trie.add(self.words)
+
+        trie = pickle.loads(pickle.dumps(self.trie))
+
+        self.assertIsNone(trie._log)
+        self.assertSameTrie(trie, self.trie)
+
+    def test_interval(self):
+        log = Trieson.TriesonLog(os.path.join(self.dir, 'quiet.log'), interval = 0.05)
+        self.addCleanup(log.close)
+
+        log.append('apple')
+
+        # nothing else is appended, so the timer has to sync
+        for _ in range(100):
+            if read_log(log.path)[1]: break
+            time.sleep(0.01)
+
+        self.assertEqual(read_log(log.path)[1], [('apple', True, 1, None)])
+
+    def test_recover(self):
+        self.trie.add(self.words)
+        self.trie.add_counts({'baby': 4})
+        self.trie._log.close()
+
+        trie = Trieson.Trieson.recover(self.snapshot, self.log, combos.none)
+        self.addCleanup(trie._log.close)
+        self.assertSameTrie(trie, self.trie)
+
+    def test_recover_unstored_proc(self):
+        upper = lambda s: [s.upper()]
+        log = os.path.join(self.dir, 'upper.log')
+
+        trie = Trieson.Trieson(upper)
+        trie.attach_log(log)
+        trie.add('abc')
+        trie.compact(self.snapshot, background = False)
+        trie.add('def')
+        trie._log.close()
+
+        with self.subTest("should replay with the proc passed in"):
+            recovered = Trieson.Trieson.recover(self.snapshot, log, upper)
+            recovered._log.close()
+            self.assertSameTrie(recovered, trie)
+
+        with self.subTest("should raise without a proc"):
+            with self.assertRaises(ValueError):
+                Trieson.Trieson.recover(self.snapshot, log)
+
+    def test_failed_add(self):
+        self.trie.add('apple')
+
+        with self.assertRaises(TypeError): self.trie.add([5])
+        with self.assertRaises(TypeError): self.trie.add('baby', threading.Lock())
+        self.assertNotIn('baby', self.trie)
+
+        self.trie.add('bonus')
+        self.trie._log.close()
+
+        with self.subTest("should log only the strings that went in"):
+            self.assertEqual([record[0] for record in read_log(self.log)[1]], ['apple', 'bonus'])
+
+        with self.subTest("should recover past the failed adds"):
+            trie = Trieson.Trieson.recover(None, self.log, combos.none)
+            self.addCleanup(trie._log.close)
+            self.assertEqual(trie.dict, {'apple', 'bonus'})
+
+    def test_torn_record(self):
+        self.trie.add(self.words)
+        self.trie._log.close()
+
+        # cut the last record short, as a crash mid-write would
+        with open(self.log, 'r+b') as f:
+            f.truncate(os.path.getsize(self.log) - 3)
+
+        trie = Trieson.Trieson.recover(None, self.log, combos.none)
+        self.addCleanup(trie._log.close)
+        self.assertEqual(trie.dict, set(self.words[:-1]))
+
+        with self.subTest("should append after the last good record"):
+            trie.add('bonus')
+            trie._log.close()
+            recovered = Trieson.Trieson.recover(None, self.log, combos.none)
+            self.addCleanup(recovered._log.close)
+            self.assertEqual(recovered.dict, set(self.words))
+
+    def test_compact(self):
+        self.trie.add(self.words)
+        self.trie.compact(self.snapshot).join()
+
+        with self.subTest("should write snapshot and drop old segments"):
+            self.assertTrue(os.path.exists(self.snapshot))
+            self.assertEqual(sorted(os.listdir(self.dir)), ['trie.log', 'trie.trieson'])
+            self.assertEqual(self.trie._log.generation, 2)
+
+        self.trie.add('zebra', 'z')
+        self.trie.compact(self.snapshot, background = False)
+        self.trie.add('yak')
+        self.trie._log.close()
+
+        with self.subTest("should recover snapshot plus newer log"):
+            trie = Trieson.Trieson.recover(self.snapshot, self.log)
+            self.addCleanup(trie._log.close)
+            self.assertSameTrie(trie, self.trie)
+            self.assertEqual(trie.get('zebra'), 'z')
+
+    def test_compact_while_adding(self):
+        self.trie.add(self.words)
+        before = dump(self.trie)
+
+        compaction = self.trie.compact(self.snapshot)
+        self.trie.add(['apex', 'bonanza', 'apple'])
+        compaction.join()
+
+        with self.subTest("should snapshot the trie as it was at compact()"):
+            snapshot = Trieson.Trieson.load(self.snapshot, mmap = False)
+            self.assertEqual(snapshot.dict, set(self.words))
+            self.assertEqual(dump(snapshot), before)
+
+        self.trie._log.close()
+
+        with self.subTest("should recover strings added during compaction"):
+            trie = Trieson.Trieson.recover(self.snapshot, self.log)
+            self.addCleanup(trie._log.close)
+            self.assertSameTrie(trie, self.trie)
+
+    def test_dawg(self):
+        trie = Trieson.Trieson(dawg = True)
+        log = trie.attach_log(os.path.join(self.dir, 'dawg.log'))
+        snapshot = os.path.join(self.dir, 'dawg.trieson')
+
+        with self.subTest("should replay into a dawg trie"):
+            trie.add(self.words)
+            log.close()
+            recovered = Trieson.Trieson.recover(snapshot, log.path, dawg = True)
+            self.assertIsNotNone(recovered._automaton)
+            self.assertSameTrie(recovered, trie)
+
+        with self.subTest("should recover a dawg trie from its snapshot"):
+            compaction = recovered.compact(snapshot)
+            recovered.add('zebra')
+            compaction.join()
+            recovered._log.close()
+            again = Trieson.Trieson.recover(snapshot, log.path)
+            self.addCleanup(again._log.close)
+            self.assertIsNotNone(again._automaton)
+            self.assertSameTrie(again, recovered)
+
+    def test_interrupted_compact(self):
+        self.trie.add(self.words)
+        self.trie.compact(self.snapshot).join()
+        self.trie.add('zebra')
+
+        # rotated but no snapshot written yet
+        self.trie._log.rotate()
+        self.trie.add('yak')
+        self.trie._log.close()
+
+        trie = Trieson.Trieson.recover(self.snapshot, self.log)
+        self.addCleanup(trie._log.close)
+        self.assertSameTrie(trie, self.trie)
+
+if __name__ == '__main__':
+    unittest.main()
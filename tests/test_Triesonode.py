@@ -1,5 +1,7 @@
 from context import Triesonode, TriesonodeTerminator, TERMINATOR
+from Trieson.Triesonode import pick_index, exclude_mask
 
+import pickle
 import unittest
 
 class TestTriesonode(unittest.TestCase):
@@ -40,6 +42,31 @@ class TestTriesonode(unittest.TestCase):
         self.assertIn('e', self.node._children)
         self.assertEqual(self.node._children['e']._count, 4)
 
+    def test_add_count(self):
+        child = self.node.add('a', count = 5)
+        self.assertEqual(child._count, 5)
+
+        self.node.add('a', count = 2)
+        self.assertEqual(child._count, 7)
+
+        child.terminate('x', 3)
+        child.terminate(count = 4)
+        self.assertEqual(child[TERMINATOR]._count, 7)
+        self.assertEqual(child[TERMINATOR].data(), 'x')
+
+    def test_pickle(self):
+        self.node.add('ab')
+        self.node['a'].add('c').terminate('x')
+        self.node.table()
+
+        copy = pickle.loads(pickle.dumps(self.node))
+
+        self.assertEqual(copy.has(), ['a', 'b'])
+        self.assertEqual(copy['a']['c'][TERMINATOR].data(), 'x')
+        self.assertIs(copy['a'].parent(), copy)
+        self.assertIsNone(copy._tables)
+        self.assertEqual(copy['b'].add('d')._count, 1)
+
     def test_add_chain(self):
         # test chaining
         word = 'argument'
@@ -135,6 +162,56 @@ class TestTriesonode(unittest.TestCase):
         with self.subTest("should work with a list"):
             self.assertEqual(self.node.get(exclude_chars = ['2','3'])._value, '1')
 
+    def test_table_cache(self):
+        self.node.add('abb')
+        child = self.node.get('a')
+        child.add('c')
+
+        table = self.node.table()
+
+        with self.subTest("should reuse cached table"):
+            self.assertIs(self.node.table(), table)
+
+        with self.subTest("should keep a table per weight"):
+            self.assertIsNot(self.node.table(2), table)
+
+        with self.subTest("should hold cumulative weights"):
+            self.assertEqual(table[2], [1, 3])
+            self.assertEqual(self.node.table(2)[2], [1, 5])
+
+        with self.subTest("adding below should leave the table alone"):
+            child.add('d')
+            self.assertIs(self.node.table(), table)
+
+        with self.subTest("adding a child should invalidate the table"):
+            self.node.add('a')
+            self.assertIsNot(self.node.table(), table)
+            self.assertEqual(self.node.table()[2], [2, 4])
+
+        with self.subTest("terminating should invalidate the table"):
+            table = self.node.table()
+            self.node.terminate()
+            self.assertIsNot(self.node.table(), table)
+
+    def test_pick_index(self):
+        self.node.add('abbccc')
+        table = self.node.table()
+
+        with self.subTest("should pick by cumulative weight"):
+            self.assertEqual(pick_index(table, 0, lambda: 0.0), 0)
+            self.assertEqual(pick_index(table, 0, lambda: 0.5), 2)
+
+        with self.subTest("should step over excluded positions"):
+            self.assertEqual(pick_index(table, 0b001, lambda: 0.0), 1)
+            self.assertEqual(pick_index(table, 0b010, lambda: 0.3), 2)
+            self.assertEqual(pick_index(table, 0b011, lambda: 0.99), 2)
+
+        with self.subTest("should return -1 if all excluded"):
+            self.assertEqual(pick_index(table, 0b111), -1)
+
+        with self.subTest("should build mask from characters"):
+            self.assertEqual(exclude_mask(table, {'a', 'c'}), 0b101)
+
     def test_data(self):
         chars = 'abcde'
         data = '54321'
@@ -181,6 +258,19 @@ class TestTriesonode(unittest.TestCase):
             with self.subTest(child = child):
                 self.assertIs(child.parent(), self.node)
 
+    def test_parent_unlinked(self):
+        child = self.node.add('a', link=False)
+        self.assertIsNone(child.parent())
+        self.assertIs(self.node.get('a'), child)
+
+    def test_slots(self):
+        self.node.add('a')
+        with self.subTest("nodes should not carry an instance dict"):
+            self.assertFalse(hasattr(self.node, '__dict__'))
+
+        with self.subTest("leaf nodes should share the empty children mapping"):
+            self.assertIs(self.node['a']._children, Triesonode()._children)
+
     def test_traverse(self):
         words = ['acorn', 'accede', 'ascend', 'ban', 'brand', 'corn']
         for word in words:
@@ -224,6 +314,31 @@ class TestTriesonode(unittest.TestCase):
         self.assertEqual(''.join(out), 'apple')
         self.assertEqual(tester, 'appleelppa')
 
+    def test_traverse_prune(self):
+        for word in ['acorn', 'ascend', 'ban']:
+            n = self.node
+            for char in word: n = n.add(char)
+
+        with self.subTest("should skip nodes below pruned nodes"):
+            out = [n._value for n in self.node.traverse(prune=lambda n: n._value == 'a')]
+            self.assertEqual(out, ['a', 'b', 'a'])
+
+        with self.subTest("should stop at max_depth"):
+            out = [n._value for n in self.node.traverse(max_depth=2)]
+            self.assertEqual(out, ['a', 'c', 's', 'b', 'a'])
+
+        with self.subTest("should call post on pruned nodes"):
+            posted = []
+            list(self.node.traverse(post=posted.append, max_depth=1))
+            self.assertEqual([n._value for n in posted], ['a', 'b'])
+
+    def test_traverse_deep(self):
+        n = self.node
+        for _ in range(5000): n = n.add('a')
+        n.terminate()
+
+        self.assertEqual(sum(1 for _ in self.node.traverse()), 5001)
+
     def test_magic_len(self):
         chars = '12345'
         self.node.add(chars)
@@ -256,27 +371,31 @@ class TestTriesonodeTerminator(unittest.TestCase):
     def test_terminate(self):
         self.node.terminate('boo!')
         with self.subTest("Should have a terminating key"):
-            self.assertIn(TERMINATOR, self.node._children)
+            self.assertIn(TERMINATOR, self.node)
+            self.assertIn(TERMINATOR, self.node.has())
 
         with self.subTest("Should set data"):
-            self.assertEqual(self.node._children[TERMINATOR].data(), 'boo!')
+            self.assertEqual(self.node[TERMINATOR].data(), 'boo!')
 
         with self.subTest("Should increment count"):
-            self.assertEqual(self.node._children[TERMINATOR]._count, 1)
+            self.assertEqual(self.node[TERMINATOR]._count, 1)
 
         self.node.terminate('bah')
 
         with self.subTest("Should increment count again"):
-            self.assertEqual(self.node._children[TERMINATOR]._count, 2)
+            self.assertEqual(self.node[TERMINATOR]._count, 2)
 
         with self.subTest("Should replace data"):
-            self.assertEqual(self.node._children[TERMINATOR].data(), 'bah')
+            self.assertEqual(self.node[TERMINATOR].data(), 'bah')
+
+        with self.subTest("Should not be stored as a child object"):
+            self.assertNotIn(TERMINATOR, self.node._children)
 
     def test_is_terminator(self):
         self.node.terminate('boo!')
 
         self.assertFalse(self.node.is_terminator())
-        self.assertTrue(self.node._children[''].is_terminator())
+        self.assertTrue(self.node[TERMINATOR].is_terminator())
 
     def test_get_terminator(self):
         self.node.terminate('boring')
@@ -287,6 +406,22 @@ class TestTriesonodeTerminator(unittest.TestCase):
         with self.subTest("Returned node should have correct data"):
             self.assertEqual(self.node.get_terminator().data(), 'boring')
 
+    def test_terminator_in_children(self):
+        self.node.add('b')
+        self.node.terminate('data')
+
+        with self.subTest("terminator should count as a child"):
+            self.assertEqual(len(self.node), 2)
+
+        with self.subTest("terminator should be iterated where it was added"):
+            self.node.add('c')
+            self.assertEqual([child._value for child in self.node], ['b', '', 'c'])
+            self.assertEqual(self.node.has(), ['b', '', 'c'])
+
+        with self.subTest("terminator data should be settable through the view"):
+            self.node.get_terminator().data('other')
+            self.assertEqual(self.node.get_terminator().data(), 'other')
+
     def test_has_terminator(self):
         self.assertFalse(self.node.has_terminator())
 
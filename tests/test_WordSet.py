@@ -0,0 +1,53 @@
+from context import Trieson
+from Trieson.WordSet import WordSet
+
+import pickle
+import unittest
+
+class TestWordSet(unittest.TestCase):
+    def setUp(self):
+        self.base = {'apple', 'apiary', 'baby'}
+        self.words, self.fork = WordSet.fork(self.base)
+
+    def test_fork(self):
+        self.words.add('bonus')
+        self.fork |= ['acorn', 'apple']
+
+        with self.subTest("should keep additions apart"):
+            self.assertEqual(self.words, {'apple', 'apiary', 'baby', 'bonus'})
+            self.assertEqual(self.fork, {'apple', 'apiary', 'baby', 'acorn'})
+            self.assertEqual(len(self.fork), 4)
+
+        with self.subTest("should share strings without copying"):
+            self.assertIs(self.words._layers[0], self.base)
+            self.assertIs(self.fork._layers[0], self.base)
+            self.assertEqual(self.base, {'apple', 'apiary', 'baby'})
+
+        with self.subTest("should fork forks"):
+            words, fork = WordSet.fork(self.fork)
+            fork.add('zebra')
+            self.assertEqual(words, {'apple', 'apiary', 'baby', 'acorn'})
+            self.assertIn('zebra', fork)
+            self.assertNotIn('zebra', self.fork)
+
+        with self.subTest("should pickle"):
+            self.assertEqual(pickle.loads(pickle.dumps(self.fork)), self.fork)
+
+    def test_layers(self):
+        words = WordSet()
+
+        for i in range(1000):
+            words.add(str(i))
+            words, _ = WordSet.fork(words)
+
+        with self.subTest("should keep layers halving"):
+            sizes = [len(layer) for layer in words._layers]
+            self.assertLessEqual(len(sizes), 11)
+            self.assertTrue(all(a > 2 * b for a, b in zip(sizes, sizes[1:])))
+
+        with self.subTest("should keep every string once"):
+            self.assertEqual(len(words), 1000)
+            self.assertEqual(sorted(words, key = int), [str(i) for i in range(1000)])
+
+if __name__ == '__main__':
+    unittest.main()